@@ -27,12 +27,10 @@ import os
 import re
 import json
 import sqlite3
-import requests
 import logging
 import argparse
-import yaml
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple, Set
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Set
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from enum import Enum
@@ -659,13 +657,19 @@ def format_code(code: str, indent_size: int = 4) -> str:
     return ''.join(result).strip()
 
 
-def get_code_preview(code: str, max_length: int = 100) -> str:
+def get_code_preview(
+    code: str,
+    max_length: int = 100,
+    pattern: Optional[re.Pattern] = None
+) -> str:
     """
     Get a short preview of code for display in lists.
 
     Args:
         code: Full code
         max_length: Maximum length of preview
+        pattern: Optional precompiled search pattern; the preview is
+                 centered on its first match instead of the code start
 
     Returns:
         Shortened code preview
@@ -673,8 +677,22 @@ def get_code_preview(code: str, max_length: int = 100) -> str:
     if not code:
         return ''
 
-    # Replace newlines with spaces
-    preview = ' '.join(code.split())
+    # Replace newlines with spaces. Without a pattern only the start is
+    # shown, so collapsing a short prefix is enough unless it is mostly
+    # whitespace; the result is the same as collapsing the whole code.
+    preview = None
+    if pattern is None:
+        preview = ' '.join(code[:4 * max_length].split())
+        if len(preview) <= max_length:
+            preview = None
+    if preview is None:
+        preview = ' '.join(code.split())
+
+    # Move the window to the first match if it would be cut off
+    if pattern is not None and len(preview) > max_length:
+        match = pattern.search(preview)
+        if match and match.end() > max_length - 3:
+            preview = '...' + preview[max(0, match.start() - 20):]
 
     if len(preview) > max_length:
         preview = preview[:max_length - 3] + '...'
@@ -798,7 +816,7 @@ class CodeLocation:
 
     def __post_init__(self):
         if self.code:
-            self.line_count = len(self.code.split('\n'))
+            self.line_count = self.code.count('\n') + 1
 
 
 # =============================================================================
@@ -813,6 +831,8 @@ class NinoxAPIClient:
         self.team_id = team_id
         self.team_name = team_name or team_id  # Fallback auf ID wenn kein Name
         self.api_key = api_key
+        # Erst hier importiert: Such-, Export- und Viewer-Aufrufe brauchen kein HTTP
+        import requests
         self.session = requests.Session()
         self.session.headers.update({
             'Authorization': f'Bearer {api_key}',
@@ -871,6 +891,52 @@ class NinoxAPIClient:
             return []
 
 
+# =============================================================================
+# SQLite-Verbindung (nur lesend)
+# =============================================================================
+
+# PRAGMAs für lesende Zugriffe (CLI, Browser, TUI): großer Page-Cache,
+# Memory-Mapping und temporäre Strukturen im RAM
+READONLY_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+# PRAGMAs für die schreibende Verbindung der Extraktion
+WRITE_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def connect_readonly(db_path: str, mmap_size: Optional[int] = None) -> sqlite3.Connection:
+    """
+    Öffnet eine bestehende SQLite-Datenbank für rein lesende Zugriffe.
+
+    Die Datei wird mit mode=ro geöffnet (fehlt sie, wird keine leere angelegt)
+    und ohne implizite Transaktionen (isolation_level=None).
+
+    Args:
+        db_path: Pfad zur SQLite-Datenbank
+        mmap_size: Optional größeres Memory-Mapping in Bytes (z.B. für die TUI)
+
+    Returns:
+        Verbindung mit sqlite3.Row als row_factory
+    """
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, isolation_level=None, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    for pragma in READONLY_PRAGMAS:
+        conn.execute(pragma)
+    if mmap_size:
+        conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    return conn
+
+
 # =============================================================================
 # Schema Extractor
 # =============================================================================
@@ -897,11 +963,19 @@ class NinoxSchemaExtractor:
         self.api = api_client
         self.db_path = db_path
         self.conn: Optional[sqlite3.Connection] = None
+        self._filter_choices: Optional[Dict[str, List[str]]] = None
+        self._statistics: Optional[Dict[str, Any]] = None
         
     def init_database(self):
         """Initialisiert die SQLite-Datenbank"""
+        self._filter_choices = None
+        self._statistics = None
         self.conn = sqlite3.connect(self.db_path)
         self.conn.row_factory = sqlite3.Row
+        # Die Datei wird bei jeder Extraktion neu geschrieben: kein fsync pro
+        # Commit, Sortierungen/Indexaufbau im RAM, großer Page-Cache
+        for pragma in WRITE_PRAGMAS:
+            self.conn.execute(pragma)
         
         cursor = self.conn.cursor()
         
@@ -1047,25 +1121,40 @@ class NinoxSchemaExtractor:
         """)
 
         # Indizes
+        # Datenbank-/Tabellenlisten sortieren nach dem DB-Namen (ORDER BY d.name ... LIMIT)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_databases_name ON databases(name)")
+        # list_tables: Tabellen je Datenbank nach Namen, ohne Sortierschritt
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tables_db_name ON tables(database_id, name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_scripts_team ON scripts(team_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_scripts_db ON scripts(database_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_scripts_table ON scripts(table_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_scripts_type ON scripts(code_type)")
+        # Sortierung der Suchtreffer (ORDER BY database_name, table_name ... LIMIT)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scripts_names ON scripts(database_name, table_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_relationships_source ON relationships(source_table_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_relationships_target ON relationships(target_table_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_fields_ref ON fields(ref_table_name)")
+        # Tabellen-Browser: Felder/Scripts einer Tabelle inkl. Sortierung
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_fields_db_table ON fields(database_id, table_id, name)")
+        # line_count steht hinter code/code_original; mit line_count im Index liest
+        # SQL_LOAD_SCRIPTS nur den Index und nie die Code-Blobs (covering index)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scripts_db_table "
+                       "ON scripts(database_id, table_name, code_type, element_name, line_count)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_dependencies_script ON script_dependencies(script_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_dependencies_source ON script_dependencies(source_database_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_dependencies_target ON script_dependencies(target_database_name)")
         
         self.conn.commit()
     
-    def extract_all(self, database_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    def extract_all(self, database_ids: Optional[List[str]] = None,
+                    fresh: bool = True) -> Dict[str, Any]:
         """
         Extrahiert alle (oder ausgewählte) Datenbanken.
         
         Args:
             database_ids: Optional Liste von DB-IDs, sonst alle
+            fresh: DB-Datei neu anlegen; False hängt an eine bestehende DB an
+                (weiteres Team in derselben Extraktion)
             
         Returns:
             Statistiken über die Extraktion
@@ -1077,7 +1166,7 @@ class NinoxSchemaExtractor:
         if self.conn:
             self.conn.close()
             self.conn = None
-        if os.path.exists(self.db_path):
+        if fresh and os.path.exists(self.db_path):
             os.remove(self.db_path)
             logger.info("Bestehende Datenbank gelöscht für Neu-Extraktion")
 
@@ -1117,6 +1206,14 @@ class NinoxSchemaExtractor:
                 continue
             
         self.conn.commit()
+
+        # FTS-Index: die per Trigger geschriebenen Segmente zu einem b-tree
+        # zusammenführen (kleiner, weniger Seiten pro MATCH)
+        self.conn.execute("INSERT INTO scripts_fts(scripts_fts) VALUES('optimize')")
+
+        # Statistiken für den Query-Planer
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
         return stats
     
     def _extract_database(self, db_id: str, db_name: str) -> Dict[str, int]:
@@ -1464,6 +1561,44 @@ class NinoxSchemaExtractor:
     # Such-Funktionen
     # =========================================================================
 
+    # FTS5-Operatoren, die aus der Sucheingabe übernommen werden
+    FTS_OPERATORS = {'AND', 'OR', 'NOT'}
+    # Token ohne Wortzeichen (z.B. nur Satzzeichen) werden übergangen
+    WORD_RE = re.compile(r'\w')
+
+    # Kurzer Fundort "Datenbank.Tabelle.Element" für Trefferlisten
+    SCRIPT_LOCATION_SQL = """
+        substr(IFNULL(s.database_name, ''), 1, 20) || '.'
+        || substr(IFNULL(NULLIF(s.table_name, ''), 'DB'), 1, 15)
+        || CASE WHEN IFNULL(s.element_name, '') = '' THEN ''
+                ELSE '.' || substr(s.element_name, 1, 10) END
+    """
+
+    @classmethod
+    def _fts_query(cls, query: str) -> Optional[str]:
+        """
+        Übersetzt eine Sucheingabe in einen sicheren FTS5-Ausdruck.
+
+        Jedes Wort wird als Phrase mit Präfix-Suche gequotet ("wort"*), damit
+        Zeichen wie ( " : oder * keinen Syntaxfehler auslösen. AND/OR/NOT
+        zwischen zwei Wörtern bleiben Operatoren.
+
+        Returns:
+            FTS5-Ausdruck oder None, wenn die Eingabe keine Wörter enthält
+        """
+        parts = []
+        for token in query.split():
+            if token in cls.FTS_OPERATORS:
+                if parts and parts[-1] not in cls.FTS_OPERATORS:
+                    parts.append(token)
+                continue
+            if not cls.WORD_RE.search(token):
+                continue
+            parts.append('"' + token.replace('"', '""') + '"*')
+        while parts and parts[-1] in cls.FTS_OPERATORS:
+            parts.pop()
+        return ' '.join(parts) or None
+
     def search_scripts(
         self, 
         query: str, 
@@ -1473,45 +1608,87 @@ class NinoxSchemaExtractor:
         limit: int = 100
     ) -> List[Dict[str, Any]]:
         """Volltextsuche in Scripts"""
+        results = []
+        for chunk in self.iter_search_scripts(query, database_id, table_name, code_type, limit):
+            results.extend(chunk)
+        return results
+
+    def iter_search_scripts(
+        self,
+        query: str,
+        database_id: Optional[str] = None,
+        table_name: Optional[str] = None,
+        code_type: Optional[str] = None,
+        limit: int = 100,
+        chunk_size: int = 10
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Volltextsuche in Scripts, liefert die Treffer in Blöcken von chunk_size"""
+        match = self._fts_query(query)
+        if match is None:
+            yield self.search_scripts_simple(query, limit)
+            return
+
         cursor = self.conn.cursor()
         
-        # FTS5 Query
-        sql = """
-            SELECT 
-                s.id, s.database_id, s.database_name, s.table_name, 
-                s.element_name, s.code_type, s.code_category, s.code,
-                s.line_count,
-                highlight(scripts_fts, 0, '>>>', '<<<') as highlighted_code
-            FROM scripts_fts 
-            JOIN scripts s ON scripts_fts.rowid = s.id
-            WHERE scripts_fts MATCH ?
-        """
-        params = [query]
+        # FTS5 Query: Treffer und Ranking in einer CTE ermitteln, damit der
+        # Join auf scripts nur noch per Primärschlüssel nachschlägt. Ohne
+        # Filter genügt es, die besten `limit` Treffer zu materialisieren.
+        filters = []
+        params = [match]
         
         if database_id:
-            sql += " AND s.database_id = ?"
+            filters.append("s.database_id = ?")
             params.append(database_id)
         if table_name:
-            sql += " AND s.table_name = ?"
+            filters.append("s.table_name = ?")
             params.append(table_name)
         if code_type:
-            sql += " AND s.code_type = ?"
+            filters.append("s.code_type = ?")
             params.append(code_type)
-            
-        sql += f" ORDER BY rank LIMIT {limit}"
+        
+        hits_limit = "" if filters else "ORDER BY rank LIMIT ?"
+        if not filters:
+            params.insert(1, limit)
+        
+        sql = f"""
+            WITH hits AS (
+                SELECT rowid AS id, rank,
+                    highlight(scripts_fts, 0, '>>>', '<<<') AS highlighted_code
+                FROM scripts_fts
+                WHERE scripts_fts MATCH ?
+                {hits_limit}
+            )
+            SELECT 
+                s.id, s.database_id, s.database_name, s.table_name, 
+                s.element_name, s.code_type, s.code_category, s.code,
+                s.line_count, hits.highlighted_code,
+                {self.SCRIPT_LOCATION_SQL} AS loc
+            FROM hits
+            JOIN scripts s ON s.id = hits.id
+        """
+        if filters:
+            sql += " WHERE " + " AND ".join(filters)
+        sql += " ORDER BY hits.rank LIMIT ?"
+        params.append(limit)
         
         try:
             cursor.execute(sql, params)
-            return [dict(row) for row in cursor.fetchall()]
         except sqlite3.OperationalError:
             # Fallback auf LIKE-Suche
-            return self.search_scripts_simple(query, limit)
+            yield self.search_scripts_simple(query, limit)
+            return
+        
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [dict(row) for row in rows]
     
     def search_scripts_simple(self, query: str, limit: int = 100) -> List[Dict[str, Any]]:
         """Einfache LIKE-Suche"""
         cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM scripts 
+        cursor.execute(f"""
+            SELECT s.*, {self.SCRIPT_LOCATION_SQL} AS loc FROM scripts s
             WHERE code LIKE ? OR table_name LIKE ? OR element_name LIKE ?
             ORDER BY database_name, table_name
             LIMIT ?
@@ -1552,43 +1729,39 @@ class NinoxSchemaExtractor:
         """Gibt alle Abhängigkeiten einer Tabelle zurück"""
         cursor = self.conn.cursor()
         
-        # Referenziert
+        # Referenziert / wird referenziert von / Formel-Referenzen in einer Abfrage
         cursor.execute("""
-            SELECT * FROM relationships 
+            SELECT 'references' AS bucket, * FROM relationships 
             WHERE source_table_name = ? AND relationship_type != 'FORMULA_REF'
-        """, (table_name,))
-        references = [dict(row) for row in cursor.fetchall()]
-        
-        # Wird referenziert von
-        cursor.execute("""
-            SELECT * FROM relationships 
+            UNION ALL
+            SELECT 'referenced_by', * FROM relationships 
             WHERE target_table_name = ? AND relationship_type != 'FORMULA_REF'
-        """, (table_name,))
-        referenced_by = [dict(row) for row in cursor.fetchall()]
-        
-        # Formel-Referenzen
-        cursor.execute("""
-            SELECT * FROM relationships 
+            UNION ALL
+            SELECT 'formula_references', * FROM relationships 
             WHERE (source_table_name = ? OR target_table_name = ?) 
             AND relationship_type = 'FORMULA_REF'
-        """, (table_name, table_name))
-        formula_refs = [dict(row) for row in cursor.fetchall()]
+        """, (table_name,) * 4)
         
-        return {
-            'references': references,
-            'referenced_by': referenced_by,
-            'formula_references': formula_refs
-        }
+        deps = {'references': [], 'referenced_by': [], 'formula_references': []}
+        for row in cursor:
+            dep = dict(row)
+            deps[dep.pop('bucket')].append(dep)
+        return deps
     
     def get_statistics(self) -> Dict[str, Any]:
-        """Gibt Gesamtstatistiken zurück"""
+        """Gibt Gesamtstatistiken zurück (gecacht bis zur nächsten Extraktion)"""
+        if self._statistics is not None:
+            return self._statistics
+
         cursor = self.conn.cursor()
         
         stats = {}
         
-        for table in ['databases', 'tables', 'fields', 'relationships', 'scripts']:
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            stats[f'{table}_count'] = cursor.fetchone()[0]
+        # Alle Zählungen in einer Abfrage
+        count_tables = ['databases', 'tables', 'fields', 'relationships', 'scripts']
+        cursor.execute("SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {table})" for table in count_tables))
+        for table, count in zip(count_tables, cursor.fetchone()):
+            stats[f'{table}_count'] = count
         
         cursor.execute("""
             SELECT code_type, COUNT(*) as count 
@@ -1615,8 +1788,30 @@ class NinoxSchemaExtractor:
         """)
         stats['scripts_by_database'] = {row['database_name']: row['count'] for row in cursor.fetchall()}
         
+        self._statistics = stats
         return stats
     
+    def get_filter_choices(self) -> Dict[str, List[str]]:
+        """
+        Tabellennamen und Code-Typen für Such-Filter (eine Abfrage, gecacht).
+
+        Returns:
+            Dict mit 'tables' und 'code_types', jeweils sortiert und eindeutig
+        """
+        if self._filter_choices is None:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT 'table' AS kind, name AS value FROM tables
+                UNION
+                SELECT 'type', code_type FROM scripts
+                ORDER BY kind, value
+            """)
+            choices = {'tables': [], 'code_types': []}
+            for kind, value in cursor.fetchall():
+                choices['tables' if kind == 'table' else 'code_types'].append(value)
+            self._filter_choices = choices
+        return self._filter_choices
+
     def list_databases(self) -> List[Dict]:
         """Listet alle extrahierten Datenbanken"""
         cursor = self.conn.cursor()
@@ -1632,36 +1827,50 @@ class NinoxSchemaExtractor:
             cursor.execute("SELECT * FROM tables ORDER BY database_id, name")
         return [dict(row) for row in cursor.fetchall()]
     
-    def export_to_json(self, output_path: str):
-        """Exportiert alles als JSON"""
+    def _write_json_rows(self, f, sql: str, params: tuple = ()):
+        """Schreibt ein Abfrageergebnis als JSON-Array, ohne es komplett zu laden"""
         cursor = self.conn.cursor()
+        cursor.arraysize = 500
+        cursor.execute(sql, params)
 
-        data = {
-            'extracted_at': datetime.now().isoformat(),
-            'databases': [],
-        }
-
-        cursor.execute("SELECT * FROM databases")
-        for db_row in cursor.fetchall():
-            db_data = dict(db_row)
-            db_id = db_data['id']
-
-            cursor.execute("SELECT * FROM tables WHERE database_id = ?", (db_id,))
-            db_data['tables'] = [dict(row) for row in cursor.fetchall()]
-
-            cursor.execute("SELECT * FROM fields WHERE database_id = ?", (db_id,))
-            db_data['fields'] = [dict(row) for row in cursor.fetchall()]
-
-            cursor.execute("SELECT * FROM relationships WHERE database_id = ?", (db_id,))
-            db_data['relationships'] = [dict(row) for row in cursor.fetchall()]
-
-            cursor.execute("SELECT * FROM scripts WHERE database_id = ?", (db_id,))
-            db_data['scripts'] = [dict(row) for row in cursor.fetchall()]
+        f.write('[')
+        first = True
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            for row in rows:
+                f.write('\n      ' if first else ',\n      ')
+                json.dump(dict(row), f, ensure_ascii=False, default=str)
+                first = False
+        f.write(']' if first else '\n    ]')
 
-            data['databases'].append(db_data)
+    def export_to_json(self, output_path: str):
+        """Exportiert alles als JSON (datensatzweise gestreamt)"""
+        cursor = self.conn.cursor()
 
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+            f.write('{\n  "extracted_at": ')
+            json.dump(datetime.now().isoformat(), f)
+            f.write(',\n  "databases": [')
+
+            cursor.execute("SELECT * FROM databases")
+            first = True
+            for db_row in cursor:
+                db_data = dict(db_row)
+                f.write('\n    ' if first else ',\n    ')
+                first = False
+
+                # Skalare Felder ohne schließende Klammer, die Listen folgen
+                f.write(json.dumps(db_data, ensure_ascii=False, default=str)[:-1])
+                for table in ('tables', 'fields', 'relationships', 'scripts'):
+                    f.write(f',\n    "{table}": ')
+                    self._write_json_rows(
+                        f, f"SELECT * FROM {table} WHERE database_id = ?", (db_data['id'],)
+                    )
+                f.write('}')
+
+            f.write(']\n}\n' if first else '\n  ]\n}\n')
 
     def export_scripts_to_html(self, output_path: str, database_id: Optional[str] = None):
         """
@@ -1823,163 +2032,174 @@ class NinoxSchemaExtractor:
             cur.execute("SELECT * FROM databases ORDER BY name")
         databases = cur.fetchall()
 
-        lines = []
-        lines.append("# 📚 Ninox Dokumentation")
-        lines.append("")
-        lines.append(f"> Generiert am: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
-        lines.append("> Diese Datei enthält die vollständige Struktur und alle Skripte.")
-        lines.append("")
-
-        # Inhaltsverzeichnis
-        lines.append("## Inhaltsverzeichnis")
-        lines.append("")
-        for db in databases:
-            db_name = db['name']
-            anchor = db_name.lower().replace(' ', '-').replace('.', '')
-            lines.append(f"- [{db_name}](#{anchor})")
-        lines.append("")
-
-        # Pro Datenbank
-        for db in databases:
-            db_name = db['name']
-            db_id = db['id']
-
-            lines.append("---")
-            lines.append(f"## 📁 {db_name}")
+        # Markdown abschnittsweise schreiben
+        with open(output_path, 'w', encoding='utf-8') as f:
+            lines = []
+
+            def flush():
+                """Schreibt die gesammelten Zeilen, damit nur ein Abschnitt im Speicher liegt"""
+                if lines:
+                    f.write('\n'.join(lines) + '\n')
+                    lines.clear()
+
+            lines.append("# 📚 Ninox Dokumentation")
             lines.append("")
-            lines.append(f"- **ID:** `{db_id}`")
-            lines.append(f"- **Tabellen:** {db['table_count']}")
-            lines.append(f"- **Scripts:** {db['code_count']}")
+            lines.append(f"> Generiert am: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+            lines.append("> Diese Datei enthält die vollständige Struktur und alle Skripte.")
             lines.append("")
 
-            # Tabellen dieser DB
-            cur.execute("""
-                SELECT * FROM tables WHERE database_id = ? ORDER BY name
-            """, (db_id,))
-            tables = cur.fetchall()
-
-            for table in tables:
-                table_name = table['name']
-                caption = table['caption'] or table_name
-                table_id = table['table_id']
-
-                lines.append(f"### 📂 {caption}")
-                if caption != table_name:
-                    lines.append(f"*ID: `{table_id}` | Name: `{table_name}`*")
-                else:
-                    lines.append(f"*ID: `{table_id}`*")
+            # Inhaltsverzeichnis
+            lines.append("## Inhaltsverzeichnis")
+            lines.append("")
+            for db in databases:
+                db_name = db['name']
+                anchor = db_name.lower().replace(' ', '-').replace('.', '')
+                lines.append(f"- [{db_name}](#{anchor})")
+            lines.append("")
+
+            # Pro Datenbank
+            flush()
+            for db in databases:
+                db_name = db['name']
+                db_id = db['id']
+
+                lines.append("---")
+                lines.append(f"## 📁 {db_name}")
+                lines.append("")
+                lines.append(f"- **ID:** `{db_id}`")
+                lines.append(f"- **Tabellen:** {db['table_count']}")
+                lines.append(f"- **Scripts:** {db['code_count']}")
                 lines.append("")
 
-                # Felder dieser Tabelle
+                # Tabellen dieser DB
                 cur.execute("""
-                    SELECT * FROM fields
-                    WHERE database_id = ? AND table_id = ?
-                    ORDER BY name
-                """, (db_id, table_id))
-                fields = cur.fetchall()
-
-                if fields:
-                    lines.append("#### Felder")
+                    SELECT * FROM tables WHERE database_id = ? ORDER BY name
+                """, (db_id,))
+                tables = cur.fetchall()
+
+                for table in tables:
+                    table_name = table['name']
+                    caption = table['caption'] or table_name
+                    table_id = table['table_id']
+
+                    lines.append(f"### 📂 {caption}")
+                    if caption != table_name:
+                        lines.append(f"*ID: `{table_id}` | Name: `{table_name}`*")
+                    else:
+                        lines.append(f"*ID: `{table_id}`*")
                     lines.append("")
-                    lines.append("| Feldname | ID | Typ | Info |")
-                    lines.append("|----------|-----|-----|------|")
 
-                    for field in fields:
-                        f_name = field['caption'] or field['name']
-                        f_id = field['field_id']
-                        f_type = field['base_type']
-                        f_ref = field['ref_table_name'] or ""
-                        if f_ref:
-                            f_ref = f"→ `{f_ref}`"
+                    # Felder dieser Tabelle
+                    cur.execute("""
+                        SELECT * FROM fields
+                        WHERE database_id = ? AND table_id = ?
+                        ORDER BY name
+                    """, (db_id, table_id))
+                    fields = cur.fetchall()
 
-                        lines.append(f"| **{f_name}** | `{f_id}` | {f_type} | {f_ref} |")
+                    if fields:
+                        lines.append("#### Felder")
+                        lines.append("")
+                        lines.append("| Feldname | ID | Typ | Info |")
+                        lines.append("|----------|-----|-----|------|")
 
-                    lines.append("")
+                        for field in fields:
+                            f_name = field['caption'] or field['name']
+                            f_id = field['field_id']
+                            f_type = field['base_type']
+                            f_ref = field['ref_table_name'] or ""
+                            if f_ref:
+                                f_ref = f"→ `{f_ref}`"
+
+                            lines.append(f"| **{f_name}** | `{f_id}` | {f_type} | {f_ref} |")
+
+                        lines.append("")
+
+                    # Scripts dieser Tabelle
+                    cur.execute("""
+                        SELECT * FROM scripts
+                        WHERE database_id = ? AND table_name = ?
+                        ORDER BY element_name, code_type
+                    """, (db_id, table_name))
+                    scripts = cur.fetchall()
+
+                    if scripts:
+                        lines.append("#### 📜 Skripte")
+                        lines.append("")
 
-                # Scripts dieser Tabelle
+                        for script in scripts:
+                            element = script['element_name'] or "(Tabellen-Ebene)"
+                            code_type = script['code_type']
+                            category = script['code_category']
+                            code = script['code'] or ""
+
+                            # Code bereinigen
+                            code = code.replace('\\r\\n', '\n').replace('\\n', '\n').replace('\\t', '\t')
+
+                            lines.append(f"**{element}** - `{code_type}` ({category})")
+                            lines.append("")
+                            lines.append("```javascript")
+                            lines.append(code.strip())
+                            lines.append("```")
+                            lines.append("")
+
+                # Globale Scripts (ohne Tabelle)
                 cur.execute("""
                     SELECT * FROM scripts
-                    WHERE database_id = ? AND table_name = ?
-                    ORDER BY element_name, code_type
-                """, (db_id, table_name))
-                scripts = cur.fetchall()
+                    WHERE database_id = ? AND (table_name IS NULL OR table_name = '')
+                    ORDER BY code_type
+                """, (db_id,))
+                global_scripts = cur.fetchall()
 
-                if scripts:
-                    lines.append("#### 📜 Skripte")
+                if global_scripts:
+                    lines.append("### 🌐 Globale Funktionen")
                     lines.append("")
 
-                    for script in scripts:
-                        element = script['element_name'] or "(Tabellen-Ebene)"
+                    for script in global_scripts:
                         code_type = script['code_type']
-                        category = script['code_category']
                         code = script['code'] or ""
-
-                        # Code bereinigen
                         code = code.replace('\\r\\n', '\n').replace('\\n', '\n').replace('\\t', '\t')
 
-                        lines.append(f"**{element}** - `{code_type}` ({category})")
+                        lines.append(f"**{code_type}**")
                         lines.append("")
                         lines.append("```javascript")
                         lines.append(code.strip())
                         lines.append("```")
                         lines.append("")
 
-            # Globale Scripts (ohne Tabelle)
+                flush()
+
+            # Beziehungen
             cur.execute("""
-                SELECT * FROM scripts
-                WHERE database_id = ? AND (table_name IS NULL OR table_name = '')
-                ORDER BY code_type
-            """, (db_id,))
-            global_scripts = cur.fetchall()
-
-            if global_scripts:
-                lines.append("### 🌐 Globale Funktionen")
-                lines.append("")
+                SELECT DISTINCT database_name FROM relationships ORDER BY database_name
+            """)
+            rel_dbs = cur.fetchall()
 
-                for script in global_scripts:
-                    code_type = script['code_type']
-                    code = script['code'] or ""
-                    code = code.replace('\\r\\n', '\n').replace('\\n', '\n').replace('\\t', '\t')
+            if rel_dbs:
+                lines.append("---")
+                lines.append("## 🔗 Beziehungen")
+                lines.append("")
 
-                    lines.append(f"**{code_type}**")
-                    lines.append("")
-                    lines.append("```javascript")
-                    lines.append(code.strip())
-                    lines.append("```")
+                for rel_db in rel_dbs:
+                    db_name = rel_db['database_name']
+                    lines.append(f"### {db_name}")
                     lines.append("")
+                    lines.append("| Von | Nach | Typ | Feld |")
+                    lines.append("|-----|------|-----|------|")
 
-        # Beziehungen
-        cur.execute("""
-            SELECT DISTINCT database_name FROM relationships ORDER BY database_name
-        """)
-        rel_dbs = cur.fetchall()
-
-        if rel_dbs:
-            lines.append("---")
-            lines.append("## 🔗 Beziehungen")
-            lines.append("")
-
-            for rel_db in rel_dbs:
-                db_name = rel_db['database_name']
-                lines.append(f"### {db_name}")
-                lines.append("")
-                lines.append("| Von | Nach | Typ | Feld |")
-                lines.append("|-----|------|-----|------|")
-
-                cur.execute("""
-                    SELECT * FROM relationships WHERE database_name = ?
-                    ORDER BY source_table_name
-                """, (db_name,))
-                rels = cur.fetchall()
+                    cur.execute("""
+                        SELECT * FROM relationships WHERE database_name = ?
+                        ORDER BY source_table_name
+                    """, (db_name,))
+                    rels = cur.fetchall()
 
-                for rel in rels:
-                    lines.append(f"| {rel['source_table_name']} | {rel['target_table_name']} | {rel['relationship_type']} | {rel['source_field_name'] or '-'} |")
+                    for rel in rels:
+                        lines.append(f"| {rel['source_table_name']} | {rel['target_table_name']} | {rel['relationship_type']} | {rel['source_field_name'] or '-'} |")
 
-                lines.append("")
+                    lines.append("")
+                    flush()
 
-        # Markdown speichern
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
+            flush()
 
         logger.info(f"Markdown Export erstellt: {output_path}")
 
@@ -1994,6 +2214,54 @@ class NinoxSchemaExtractor:
 # CLI
 # =============================================================================
 
+def _extract_env(args, config: dict, env_name: str, fresh: bool) -> bool:
+    """Extrahiert ein Environment in args.db; False, wenn Zugangsdaten fehlen"""
+    # Credentials laden (Priorität: CLI-Argumente > Config-Datei > Umgebungsvariablen)
+    domain = args.domain
+    team_id = args.team
+    team_name = None
+    api_key = args.apikey
+
+    if args.config:
+        env_config = config.get('environments', {}).get(env_name, {})
+        domain = domain or env_config.get('domain')
+        team_id = team_id or env_config.get('workspaceId') or env_config.get('teamId')
+        team_name = env_config.get('teamName') or env_config.get('name') or env_name
+        api_key = api_key or env_config.get('apiKey')
+
+    # Fallback auf Umgebungsvariablen (aus .env oder System)
+    domain = domain or os.getenv('NINOX_DOMAIN')
+    team_id = team_id or os.getenv('NINOX_TEAM_ID')
+    team_name = team_name or os.getenv('NINOX_TEAM_NAME') or team_id
+    api_key = api_key or os.getenv('NINOX_API_KEY')
+
+    if not all([domain, team_id, api_key]):
+        print("❌ Fehler: domain, team und apikey müssen angegeben werden!")
+        return False
+
+    print(f"🔌 Verbinde mit: {domain}")
+
+    # Client erstellen und Team-Namen von API holen wenn nicht in Config
+    client = NinoxAPIClient(domain, team_id, api_key, team_name=team_name)
+    if not team_name or team_name == team_id:
+        api_team_name = client.get_team_name()
+        client.team_name = api_team_name
+        print(f"📦 Team: {api_team_name} ({team_id})")
+    else:
+        print(f"📦 Team: {team_name} ({team_id})")
+
+    extractor = NinoxSchemaExtractor(client, args.db)
+
+    stats = extractor.extract_all(args.databases, fresh=fresh)
+    
+    print(f"\n✅ Extraktion abgeschlossen:")
+    for key, value in stats.items():
+        print(f"   {key}: {value}")
+    print(f"\n💾 Gespeichert in: {args.db}")
+    extractor.close()
+    return True
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Ninox API Schema & Script Extractor',
@@ -2033,7 +2301,8 @@ Beispiele:
     extract_p.add_argument('--team', help='Team/Workspace ID')
     extract_p.add_argument('--apikey', help='API Key')
     extract_p.add_argument('--config', help='Config YAML Datei')
-    extract_p.add_argument('--env', default='dev', help='Environment in Config')
+    extract_p.add_argument('--env', default='dev',
+                           help='Environment in Config (mehrere kommagetrennt: prod,dev)')
     extract_p.add_argument('--db', default='ninox_schema.db', help='SQLite Ausgabe')
     extract_p.add_argument('--databases', nargs='*', help='Nur bestimmte DB-IDs')
     
@@ -2080,56 +2349,36 @@ Beispiele:
     args = parser.parse_args()
     
     if args.command == 'extract':
-        # Credentials laden (Priorität: CLI-Argumente > Config-Datei > Umgebungsvariablen)
-        domain = args.domain
-        team_id = args.team
-        team_name = None
-        api_key = args.apikey
-
+        # Mehrere Environments laufen nacheinander in diesem Prozess und
+        # schreiben in dieselbe DB; nur das erste legt die Datei neu an
+        env_names = [name.strip() for name in args.env.split(',') if name.strip()] or ['dev']
+        config = {}
         if args.config:
-            with open(args.config, 'r') as f:
-                config = yaml.safe_load(f)
-            env_config = config.get('environments', {}).get(args.env, {})
-            domain = domain or env_config.get('domain')
-            team_id = team_id or env_config.get('workspaceId') or env_config.get('teamId')
-            team_name = env_config.get('teamName') or env_config.get('name') or args.env
-            api_key = api_key or env_config.get('apiKey')
-
-        # Fallback auf Umgebungsvariablen (aus .env oder System)
-        domain = domain or os.getenv('NINOX_DOMAIN')
-        team_id = team_id or os.getenv('NINOX_TEAM_ID')
-        team_name = team_name or os.getenv('NINOX_TEAM_NAME') or team_id
-        api_key = api_key or os.getenv('NINOX_API_KEY')
-
-        if not all([domain, team_id, api_key]):
-            print("❌ Fehler: domain, team und apikey müssen angegeben werden!")
-            return
-
-        print(f"🔌 Verbinde mit: {domain}")
-
-        # Client erstellen und Team-Namen von API holen wenn nicht in Config
-        client = NinoxAPIClient(domain, team_id, api_key, team_name=team_name)
-        if not team_name or team_name == team_id:
-            api_team_name = client.get_team_name()
-            client.team_name = api_team_name
-            print(f"📦 Team: {api_team_name} ({team_id})")
-        else:
-            print(f"📦 Team: {team_name} ({team_id})")
-
-        extractor = NinoxSchemaExtractor(client, args.db)
+            import yaml
+            # LibYAML-Loader, falls PyYAML damit gebaut wurde
+            loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+            with open(args.config, 'rb') as f:
+                config = yaml.load(f, Loader=loader) or {}
+
+        failed = False
+        fresh = True
+        for env_name in env_names:
+            if len(env_names) > 1:
+                print(f"\n► {env_name}")
+            try:
+                if _extract_env(args, config, env_name, fresh):
+                    fresh = False
+                else:
+                    failed = True
+            except Exception as e:
+                print(f"❌ Fehler bei {env_name}: {e}")
+                failed = True
+        if failed:
+            raise SystemExit(1)
 
-        stats = extractor.extract_all(args.databases)
-        
-        print(f"\n✅ Extraktion abgeschlossen:")
-        for key, value in stats.items():
-            print(f"   {key}: {value}")
-        print(f"\n💾 Gespeichert in: {args.db}")
-        extractor.close()
-        
     elif args.command == 'search':
         extractor = NinoxSchemaExtractor(None, args.db)
-        extractor.conn = sqlite3.connect(args.db)
-        extractor.conn.row_factory = sqlite3.Row
+        extractor.conn = connect_readonly(args.db)
 
         results = extractor.search_scripts(
             args.query,
@@ -2165,8 +2414,7 @@ Beispiele:
         
     elif args.command == 'deps':
         extractor = NinoxSchemaExtractor(None, args.db)
-        extractor.conn = sqlite3.connect(args.db)
-        extractor.conn.row_factory = sqlite3.Row
+        extractor.conn = connect_readonly(args.db)
         
         deps = extractor.get_table_dependencies(args.table)
         
@@ -2192,8 +2440,7 @@ Beispiele:
         
     elif args.command == 'stats':
         extractor = NinoxSchemaExtractor(None, args.db)
-        extractor.conn = sqlite3.connect(args.db)
-        extractor.conn.row_factory = sqlite3.Row
+        extractor.conn = connect_readonly(args.db)
         
         stats = extractor.get_statistics()
         
@@ -2219,8 +2466,7 @@ Beispiele:
         
     elif args.command == 'list':
         extractor = NinoxSchemaExtractor(None, args.db)
-        extractor.conn = sqlite3.connect(args.db)
-        extractor.conn.row_factory = sqlite3.Row
+        extractor.conn = connect_readonly(args.db)
         
         if args.database:
             tables = extractor.list_tables(args.database)
@@ -2237,8 +2483,7 @@ Beispiele:
         
     elif args.command == 'export':
         extractor = NinoxSchemaExtractor(None, args.db)
-        extractor.conn = sqlite3.connect(args.db)
-        extractor.conn.row_factory = sqlite3.Row
+        extractor.conn = connect_readonly(args.db)
 
         extractor.export_to_json(args.output)
         print(f"✅ Exportiert: {args.output}")
@@ -2246,8 +2491,7 @@ Beispiele:
 
     elif args.command == 'html':
         extractor = NinoxSchemaExtractor(None, args.db)
-        extractor.conn = sqlite3.connect(args.db)
-        extractor.conn.row_factory = sqlite3.Row
+        extractor.conn = connect_readonly(args.db)
 
         extractor.export_scripts_to_html(args.output, args.database)
         print(f"✅ HTML exportiert: {args.output}")
@@ -2255,8 +2499,7 @@ Beispiele:
 
     elif args.command == 'md':
         extractor = NinoxSchemaExtractor(None, args.db)
-        extractor.conn = sqlite3.connect(args.db)
-        extractor.conn.row_factory = sqlite3.Row
+        extractor.conn = connect_readonly(args.db)
 
         extractor.export_to_markdown(args.output, args.database)
         print(f"✅ Markdown exportiert: {args.output}")
@@ -12,7 +12,6 @@ Verwendung:
 """
 
 import os
-import sqlite3
 from pathlib import Path
 from typing import Optional, List
 
@@ -27,6 +26,7 @@ from rich import print as rprint
 from ninox_api_extractor import (
     NinoxAPIClient,
     NinoxSchemaExtractor,
+    connect_readonly,
     get_code_preview,
     SYNTAX_HIGHLIGHTING_AVAILABLE,
 )
@@ -48,16 +48,17 @@ DEFAULT_DB = "ninox_schema.db"
 def load_config(config_path: str, env: str) -> dict:
     """Lädt Konfiguration aus YAML-Datei"""
     import yaml
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+    # LibYAML-Loader, falls PyYAML damit gebaut wurde
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(config_path, 'rb') as f:
+        config = yaml.load(f, Loader=loader)
     return config.get('environments', {}).get(env, {})
 
 
 def get_extractor(db_path: str) -> NinoxSchemaExtractor:
     """Erstellt einen Extractor mit bestehender DB"""
     extractor = NinoxSchemaExtractor(None, db_path)
-    extractor.conn = sqlite3.connect(db_path)
-    extractor.conn.row_factory = sqlite3.Row
+    extractor.conn = connect_readonly(db_path)
     return extractor
 
 
@@ -13,8 +13,8 @@ Verwendung:
 """
 
 import os
+import re
 import sys
-import sqlite3
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 from datetime import datetime
@@ -29,12 +29,14 @@ from rich.syntax import Syntax
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.tree import Tree
 from rich.markdown import Markdown
+from rich.text import Text
 from rich import print as rprint
 
 # Importiere Klassen aus dem bestehenden Modul
 from ninox_api_extractor import (
     NinoxAPIClient,
     NinoxSchemaExtractor,
+    connect_readonly,
     get_code_preview,
     highlight_code,
     SYNTAX_HIGHLIGHTING_AVAILABLE,
@@ -67,6 +69,22 @@ custom_style = Style([
 
 DEFAULT_DB = "ninox_schema.db"
 
+# Abfragen für den Tabellen-Browser (feste Strings für den Statement-Cache)
+_SQL_FIELDS_FOR_TABLE = """
+    SELECT IFNULL(NULLIF(caption, ''), name) AS label, field_id,
+           IFNULL(base_type, '') AS base_type,
+           IFNULL(ref_table_name, '') AS ref_table_name, has_formula
+    FROM fields
+    WHERE database_id = ? AND table_id = ?
+    ORDER BY name
+"""
+
+_SQL_SCRIPTS_FOR_TABLE = """
+    SELECT * FROM scripts
+    WHERE database_id = ? AND table_name = ?
+    ORDER BY code_type, element_name
+"""
+
 
 # =============================================================================
 # Hilfsfunktionen
@@ -75,8 +93,7 @@ DEFAULT_DB = "ninox_schema.db"
 def get_extractor(db_path: str) -> NinoxSchemaExtractor:
     """Erstellt einen Extractor mit bestehender DB"""
     extractor = NinoxSchemaExtractor(None, db_path)
-    extractor.conn = sqlite3.connect(db_path)
-    extractor.conn.row_factory = sqlite3.Row
+    extractor.conn = connect_readonly(db_path)
     return extractor
 
 
@@ -88,8 +105,10 @@ def db_exists(db_path: str) -> bool:
 def load_yaml_config(config_path: str) -> Dict[str, Any]:
     """Lädt YAML-Konfiguration"""
     import yaml
-    with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+    # LibYAML-Loader, falls PyYAML damit gebaut wurde
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(config_path, 'rb') as f:
+        return yaml.load(f, Loader=loader)
 
 
 def prompt_credentials() -> Dict[str, str]:
@@ -379,9 +398,7 @@ def run_extraction(domain, team, apikey, config, env, db_path, databases):
     """Führt Extraktion im non-interactive Mode aus"""
     # Lade config falls angegeben
     if config:
-        import yaml
-        with open(config, 'r') as f:
-            cfg = yaml.safe_load(f)
+        cfg = load_yaml_config(config)
         env_cfg = cfg.get('environments', {}).get(env, {})
         domain = domain or env_cfg.get('domain')
         team = team or env_cfg.get('workspaceId') or env_cfg.get('teamId')
@@ -454,9 +471,9 @@ def interactive_search(db_path: str = DEFAULT_DB):
         limit = 20
 
         if add_filter:
-            # Tabellen laden für Auswahl
-            tables = extractor.list_tables()
-            table_names = sorted(set(t['name'] for t in tables))
+            # Tabellen und Code-Typen für die Auswahl (gecacht)
+            choices = extractor.get_filter_choices()
+            table_names = choices['tables']
 
             if table_names:
                 table_filter = questionary.autocomplete(
@@ -466,9 +483,7 @@ def interactive_search(db_path: str = DEFAULT_DB):
                 ).ask() or None
 
             # Code-Typen
-            cursor = extractor.conn.cursor()
-            cursor.execute("SELECT DISTINCT code_type FROM scripts ORDER BY code_type")
-            code_types = [row[0] for row in cursor.fetchall()]
+            code_types = choices['code_types']
 
             if code_types:
                 type_filter = questionary.select(
@@ -532,25 +547,49 @@ def interactive_search(db_path: str = DEFAULT_DB):
 
 def display_search_results(results: List[Dict], query: str):
     """Zeigt Suchergebnisse an"""
+    if not results:
+        console.print("[yellow]Keine Treffer gefunden.[/yellow]")
+        return
+
     console.print(f"\n[cyan]{len(results)}[/cyan] Treffer für '[yellow]{query}[/yellow]':\n")
 
-    table = Table(show_header=True, expand=True)
-    table.add_column("#", style="dim", width=3)
-    table.add_column("Ort", style="cyan", no_wrap=True)
-    table.add_column("Typ", style="yellow", width=12)
-    table.add_column("Vorschau", style="dim", overflow="ellipsis")
+    # Suchmuster einmal kompilieren, Vorschau um den Treffer legen; markiert
+    # wird jeder Suchbegriff einzeln, ohne die Operatoren AND/OR/NOT
+    terms = sorted((t for t in query.split() if t not in NinoxSchemaExtractor.FTS_OPERATORS),
+                   key=len, reverse=True)
+    query_re = re.compile('|'.join(map(re.escape, terms)) or re.escape(query), re.IGNORECASE)
 
-    for i, r in enumerate(results, 1):
+    rows = []
+    for r in results:
         loc = f"{r['database_name'][:15]}.{(r['table_name'] or 'DB')[:15]}"
         if r['element_name']:
             loc += f".{r['element_name'][:15]}"
 
-        preview = get_code_preview(r['code'], max_length=60)
+        preview = Text(get_code_preview(r['code'], max_length=60, pattern=query_re))
+        preview.highlight_regex(query_re, style="bold yellow")
+        rows.append((loc, r['code_type'], preview))
+
+    # Wenige Treffer: direkt als Zeilen ausgeben, ohne Tabellen-Layout
+    if len(rows) <= 5:
+        for i, (loc, code_type, preview) in enumerate(rows, 1):
+            line = Text.assemble((f"{i}. ", "dim"), (loc, "cyan"), "  ", (code_type, "yellow"), "  ")
+            preview.stylize("dim")
+            line.append_text(preview)
+            console.print(line, no_wrap=True, overflow="ellipsis")
+        console.print()
+        return
 
+    table = Table(show_header=True, expand=True)
+    table.add_column("#", style="dim", width=3)
+    table.add_column("Ort", style="cyan", no_wrap=True)
+    table.add_column("Typ", style="yellow", width=12)
+    table.add_column("Vorschau", style="dim", overflow="ellipsis")
+
+    for i, (loc, code_type, preview) in enumerate(rows, 1):
         table.add_row(
             str(i),
             loc,
-            r['code_type'],
+            code_type,
             preview
         )
 
@@ -679,27 +718,19 @@ def browse_database(extractor: NinoxSchemaExtractor, db_info: Dict):
 
 def browse_table(extractor: NinoxSchemaExtractor, db_info: Dict, table_info: Dict):
     """Zeigt Tabellen-Details"""
-    cursor = extractor.conn.cursor()
+    conn = extractor.conn
+
+    # Felder und Scripts ändern sich beim Browsen nicht - einmal laden
+    fields = [dict(row) for row in conn.execute(
+        _SQL_FIELDS_FOR_TABLE, (db_info['id'], table_info['table_id'])
+    ).fetchall()]
+    scripts = [dict(row) for row in conn.execute(
+        _SQL_SCRIPTS_FOR_TABLE, (db_info['id'], table_info['name'])
+    ).fetchall()]
 
     while True:
         console.print(f"\n[bold cyan]{db_info['name']} > {table_info['name']}[/bold cyan]\n")
 
-        # Felder laden
-        cursor.execute("""
-            SELECT * FROM fields
-            WHERE database_id = ? AND table_id = ?
-            ORDER BY name
-        """, (db_info['id'], table_info['table_id']))
-        fields = [dict(row) for row in cursor.fetchall()]
-
-        # Scripts laden
-        cursor.execute("""
-            SELECT * FROM scripts
-            WHERE database_id = ? AND table_name = ?
-            ORDER BY code_type, element_name
-        """, (db_info['id'], table_info['name']))
-        scripts = [dict(row) for row in cursor.fetchall()]
-
         action = questionary.select(
             "Anzeigen:",
             choices=[
@@ -733,16 +764,14 @@ def show_fields(fields: List[Dict]):
     table.add_column("Referenz", style="green")
     table.add_column("Formel", style="magenta")
 
+    # Anzeigename und leere Spalten kommen bereits aus _SQL_FIELDS_FOR_TABLE
     for f in fields:
-        ref = f['ref_table_name'] or ""
-        formula = "Ja" if f['has_formula'] else ""
-
         table.add_row(
-            f['caption'] or f['name'],
+            f['label'],
             f['field_id'],
-            f['base_type'] or "",
-            ref,
-            formula
+            f['base_type'],
+            f['ref_table_name'],
+            "Ja" if f['has_formula'] else ""
         )
 
     console.print(table)
@@ -759,16 +788,17 @@ def browse_scripts(scripts: List[Dict]):
         console.print("[yellow]Keine Scripts vorhanden.[/yellow]")
         return
 
-    while True:
-        choices = [
-            questionary.Choice(
-                title=f"{s['element_name'] or '(Tabelle)'} - {s['code_type']} ({s['line_count']} Zeilen)",
-                value=s
-            )
-            for s in scripts
-        ]
-        choices.append(questionary.Choice(title="<< Zurück", value=None))
+    # Die Auswahl ändert sich zwischen den Durchläufen nicht
+    choices = [
+        questionary.Choice(
+            title=f"{s['element_name'] or '(Tabelle)'} - {s['code_type']} ({s['line_count']} Zeilen)",
+            value=s
+        )
+        for s in scripts
+    ]
+    choices.append(questionary.Choice(title="<< Zurück", value=None))
 
+    while True:
         selected = questionary.select(
             "Script auswählen:",
             choices=choices,
@@ -8,18 +8,31 @@ Unterstützt AND/OR Filter-Logik und Dark/Light Themes.
 
 import sqlite3
 import sys
+from bisect import bisect_right
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable, Optional
 
-from textual import events
+from textual import events, work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
-from textual.containers import Container, ScrollableContainer
-from textual.widgets import Static, Input, DataTable, OptionList
-from textual.widgets.option_list import Option
+from textual.cache import LRUCache
+from textual.containers import Container
+from textual.geometry import Region, Size
+from textual.message import Message
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets import Static, Input, DataTable
 from textual.reactive import reactive
+from textual.worker import get_current_worker
+from rich.segment import Segment
+from rich.style import Style
 from rich.syntax import Syntax
-from rich.text import Text
+from rich.text import Span, Text
+
+from ninox_api_extractor import connect_readonly
 
 # =============================================================================
 # Datentypen
@@ -27,6 +40,12 @@ from rich.text import Text
 
 @dataclass
 class Script:
+    # __slots__ statt __dict__: weniger Speicher pro Script, schnellerer Attributzugriff
+    __slots__ = (
+        "id", "database_id", "database_name", "table_id", "table_name",
+        "element_id", "element_name", "code_type", "code_category", "code", "line_count",
+    )
+
     id: int
     database_id: str
     database_name: str
@@ -36,7 +55,7 @@ class Script:
     element_name: str
     code_type: str
     code_category: str
-    code: str
+    code: Optional[str]         # None: wird erst beim Anzeigen geladen (load_code)
     line_count: int
 
 
@@ -44,105 +63,498 @@ class Script:
 # Datenbank
 # =============================================================================
 
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = connect_readonly(db_path)
+    # Die Abfragen hier entpacken Tupel; sqlite3.Row wäre nur Overhead
+    conn.row_factory = None
+    return conn
+
+
 def load_scripts(db_path: str) -> list[Script]:
-    """Lädt alle Scripts aus der Datenbank."""
-    conn = sqlite3.connect(db_path)
+    """Lädt alle Scripts aus der Datenbank.
+
+    Der Code wird nur für den Suchindex gelesen und nicht in den Scripts
+    gehalten (code=None); angezeigt wird er über load_code.
+    """
+    conn = _connect(db_path)
     cursor = conn.cursor()
 
+    # Spalten in Reihenfolge der Script-Felder, NULL-Werte schon in SQL ersetzt;
+    # die letzte Spalte ist der (noch nicht kleingeschriebene) Suchtext
+    cursor.arraysize = 1000
     cursor.execute("""
-        SELECT id, database_id, database_name, table_id, table_name,
-               element_id, element_name, code_type, code_category, code, line_count
+        SELECT id, database_id, database_name,
+               IFNULL(table_id, ''), IFNULL(table_name, ''),
+               IFNULL(element_id, ''), IFNULL(element_name, ''),
+               code_type, IFNULL(code_category, ''), NULL, line_count,
+               database_name || ' ' || IFNULL(table_name, '') || ' ' ||
+               IFNULL(element_name, '') || ' ' || code_type || ' ' ||
+               IFNULL(code_category, '') || ' ' || IFNULL(code, '')
         FROM scripts
         ORDER BY database_name, table_name, element_name, code_type
     """)
 
     scripts = []
-    for row in cursor.fetchall():
-        scripts.append(Script(
-            id=row[0],
-            database_id=row[1],
-            database_name=row[2],
-            table_id=row[3] or "",
-            table_name=row[4] or "",
-            element_id=row[5] or "",
-            element_name=row[6] or "",
-            code_type=row[7],
-            code_category=row[8] or "",
-            code=row[9],
-            line_count=row[10]
-        ))
+    texts = []
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            break
+        for row in rows:
+            scripts.append(Script(*row[:11]))
+            # Kleinschreibung in Python: SQLite lower() kennt nur ASCII (keine Umlaute)
+            texts.append(row[11].lower())
 
     conn.close()
+    register_search_index(scripts, SearchIndex.from_texts(texts))
     return scripts
 
 
+@lru_cache(maxsize=32)
+def load_code(db_path: str, script_id: int) -> str:
+    """Lädt den Code eines einzelnen Scripts (die letzten 32 bleiben im Cache)."""
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT code FROM scripts WHERE id = ?", (script_id,)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row and row[0] is not None else ""
+
+
 # =============================================================================
 # Filter
 # =============================================================================
 
-def filter_scripts(scripts: list[Script], filter_text: str) -> list[Script]:
-    """Filtert Scripts mit AND/OR Logik."""
+def search_text(script: Script, code: Optional[str]) -> str:
+    """Kleingeschriebener Suchtext eines Scripts (Metadaten und Code)."""
+    return " ".join([
+        script.database_name,
+        script.table_name,
+        script.element_name,
+        script.code_type,
+        script.code_category,
+        code or ""
+    ]).lower()
+
+
+class SearchIndex:
+    """Suchtexte aller Scripts als ein einziger String.
+
+    Ein Suchbegriff wird per str.find über den ganzen Korpus gesucht, statt
+    pro Script eine Python-Schleife zu durchlaufen. Die Trefferpositionen
+    werden per Bisect auf den Script-Index abgebildet.
+    """
+
+    SEPARATOR = "\0"
+
+    def __init__(self, scripts: list[Script]):
+        self._build([search_text(script, script.code) for script in scripts])
+
+    @classmethod
+    def from_texts(cls, texts: list[str]) -> "SearchIndex":
+        """Baut den Index aus fertigen Suchtexten (siehe search_text)."""
+        index = cls.__new__(cls)
+        index._build(texts)
+        return index
+
+    def _build(self, texts: list[str]):
+        self.starts = []
+        self.ends = []
+        pos = 0
+        for text in texts:
+            self.starts.append(pos)
+            pos += len(text)
+            self.ends.append(pos)
+            pos += 1
+        self.corpus = self.SEPARATOR.join(texts)
+
+    def matching(self, term: str) -> set[int]:
+        """Liefert die Indizes aller Scripts, die den Begriff enthalten."""
+        hits = set()
+        find = self.corpus.find
+        starts = self.starts
+        pos = find(term)
+        while pos >= 0:
+            idx = bisect_right(starts, pos) - 1
+            hits.add(idx)
+            # Direkt zum nächsten Script springen
+            if idx + 1 >= len(starts):
+                break
+            pos = find(term, starts[idx + 1])
+        return hits
+
+    def narrow(self, candidates: set[int], term: str) -> set[int]:
+        """Prüft einen Begriff nur im Text der Kandidaten (str.find mit Grenzen)."""
+        find = self.corpus.find
+        starts = self.starts
+        ends = self.ends
+        return {i for i in candidates if find(term, starts[i], ends[i]) >= 0}
+
+
+# Zuletzt gebauter Index (Script-Liste, Anzahl, Index) für Aufrufe ohne eigenen Index
+_last_index: Optional[tuple[list, int, SearchIndex]] = None
+
+
+def register_search_index(scripts: list[Script], index: SearchIndex):
+    """Hinterlegt einen bereits gebauten Index für die Script-Liste."""
+    global _last_index
+    _last_index = (scripts, len(scripts), index)
+
+
+def get_search_index(scripts: list[Script]) -> SearchIndex:
+    """Liefert den Suchindex zur Script-Liste; wird nur bei neuer Liste neu gebaut."""
+    global _last_index
+    if _last_index is None or _last_index[0] is not scripts or _last_index[1] != len(scripts):
+        _last_index = (scripts, len(scripts), SearchIndex(scripts))
+    return _last_index[2]
+
+
+@lru_cache(maxsize=64)
+def parse_filter(filter_text: str) -> tuple[tuple[str, ...], ...]:
+    """Zerlegt den Filter in OR-Gruppen aus AND-Begriffen (klein, ohne Duplikate)."""
+    groups = []
+    for or_group in filter_text.strip().split(" OR "):
+        terms = [t.strip().lower() for t in or_group.strip().split(" AND ")]
+        terms = tuple(dict.fromkeys(t for t in terms if t))
+        if terms and terms not in groups:
+            groups.append(terms)
+    return tuple(groups)
+
+
+def filter_implies(narrow_text: str, broad_text: str) -> bool:
+    """True, wenn jeder Treffer von narrow_text sicher auch broad_text erfüllt.
+
+    Das gilt, wenn jede OR-Gruppe des engeren Filters eine Gruppe des weiteren
+    Filters abdeckt, d.h. jeder Begriff der weiteren Gruppe ist Teilstring
+    eines Begriffs der engeren Gruppe (z.B. "foo" -> "foob" oder "foo AND bar").
+    """
+    broad = parse_filter(broad_text.strip())
+    narrow = parse_filter(narrow_text.strip())
+    if not broad or not narrow:
+        return False
+    return all(
+        any(all(any(b in n for n in group) for b in broad_group) for broad_group in broad)
+        for group in narrow
+    )
+
+
+def filter_indices(scripts: list[Script], filter_text: str,
+                   index: Optional[SearchIndex] = None,
+                   candidates: Optional[list[int]] = None) -> list[int]:
+    """Liefert die (sortierten) Indizes der Scripts, die den Filter erfüllen.
+
+    Mit candidates wird nur innerhalb dieser Indizes gesucht (z.B. die Treffer
+    eines weiteren Filters, siehe filter_implies).
+    """
     filter_text = filter_text.strip()
     if not filter_text:
-        return scripts
-
-    result = []
-    or_groups = filter_text.split(" OR ")
-
-    for script in scripts:
-        search_text = " ".join([
-            script.database_name,
-            script.table_name,
-            script.element_name,
-            script.code_type,
-            script.code_category,
-            script.code
-        ]).lower()
-
-        for or_group in or_groups:
-            or_group = or_group.strip()
-            if not or_group:
+        return list(range(len(scripts)))
+
+    if index is None:
+        index = get_search_index(scripts)
+    if candidates is None:
+        scan = index.matching
+    else:
+        candidate_set = set(candidates)
+
+        def scan(term: str) -> set[int]:
+            return index.narrow(candidate_set, term)
+
+    matched = set()
+    corpus_hits: dict[str, set[int]] = {}
+    for terms in parse_filter(filter_text):
+        # Ein Begriff wird höchstens einmal über den ganzen Korpus gesucht:
+        # schon gescannte Begriffe anderer OR-Gruppen wiederverwenden, sonst
+        # den längsten Begriff scannen. Die übrigen nur in den Kandidaten prüfen.
+        known = [t for t in terms if t in corpus_hits]
+        if known:
+            first = min(known, key=lambda t: len(corpus_hits[t]))
+        else:
+            first = max(terms, key=len)
+            corpus_hits[first] = scan(first)
+        hits = corpus_hits[first]
+        for term in sorted(terms, key=len, reverse=True):
+            if not hits:
+                break
+            if term == first:
                 continue
+            if term in corpus_hits:
+                hits = hits & corpus_hits[term]
+            else:
+                hits = index.narrow(hits, term)
+        matched |= hits
 
-            and_terms = or_group.split(" AND ")
-            all_match = True
+    return sorted(matched)
 
-            for term in and_terms:
-                term = term.strip().lower()
-                if term and term not in search_text:
-                    all_match = False
-                    break
 
-            if all_match:
-                result.append(script)
-                break
+def filter_scripts(scripts: list[Script], filter_text: str,
+                   index: Optional[SearchIndex] = None) -> list[Script]:
+    """Filtert Scripts mit AND/OR Logik."""
+    if not filter_text.strip():
+        return scripts
+    return [scripts[i] for i in filter_indices(scripts, filter_text, index)]
 
-    return result
+
+# Spalten der Script-Liste und ihre Farben
+LINE_COLUMNS = ("database", "table", "element", "type", "category")
+LINE_STYLES = ("cyan", "green", "yellow", "magenta", "blue")
+
+
+@lru_cache(maxsize=16)
+def _line_layout(widths: tuple[int, ...]) -> tuple[str, tuple[Span, ...]]:
+    """Format-String und Style-Spans einer Zeile für feste Spaltenbreiten."""
+    # {:<w.w} kürzt und paddet in einem Schritt (wie s[:w].ljust(w))
+    fmt = " │ ".join(f"{{:<{w}.{w}}}" for w in widths)
+    spans = []
+    pos = 0
+    for i, (w, style) in enumerate(zip(widths, LINE_STYLES)):
+        if i:
+            spans.append(Span(pos, pos + 3, "dim"))
+            pos += 3
+        spans.append(Span(pos, pos + w, style))
+        pos += w
+    return fmt, tuple(spans)
 
 
 def format_script_line(script: Script, col_widths: dict) -> Text:
     """Formatiert eine Script-Zeile als Rich Text."""
-    w = col_widths
+    fmt, spans = _line_layout(tuple(col_widths[c] for c in LINE_COLUMNS))
+    plain = fmt.format(
+        script.database_name,
+        script.table_name,
+        script.element_name or "(Tabelle)",
+        script.code_type,
+        script.code_category
+    )
+    return Text(plain, spans=list(spans))
+
+
+# =============================================================================
+# Script-Liste
+# =============================================================================
+
+class ScriptList(ScrollView, can_focus=True):
+    """Script-Liste mit einer Zeile pro Script, gerendert nur im sichtbaren Bereich.
+
+    Das Widget hält nur die Liste der Script-Indizes, die Zeilen liefert die
+    übergebene Funktion. Ein neuer Filter tauscht nur diese Liste aus, es
+    entstehen keine Objekte pro Zeile.
+    """
+
+    COMPONENT_CLASSES = {"script-list--highlighted"}
+
+    DEFAULT_CSS = """
+    ScriptList {
+        height: 1fr;
+        padding: 0 1;
+        scrollbar-gutter: stable;
+    }
+
+    ScriptList > .script-list--highlighted {
+        background: $accent;
+    }
+    """
+
+    BINDINGS = [
+        Binding("up", "cursor_up", show=False),
+        Binding("down", "cursor_down", show=False),
+        Binding("home", "first", show=False),
+        Binding("end", "last", show=False),
+        Binding("pageup", "page_up", show=False),
+        Binding("pagedown", "page_down", show=False),
+        Binding("enter", "select", show=False),
+    ]
+
+    highlighted = reactive(0)
+
+    # Cursor-Bewegungen eines Frames (~60/s) werden zu einer zusammengefasst
+    MOVE_INTERVAL = 1 / 60
+
+    class Selected(Message):
+        """Ein Script wurde ausgewählt (index = Index in der Script-Liste der App)."""
+
+        def __init__(self, index: int):
+            super().__init__()
+            self.index = index
+
+    def __init__(self, line: Callable[[int], Text], **kwargs):
+        super().__init__(**kwargs)
+        self._line = line
+        self.ids: list[int] = []
+        self._strips: LRUCache[int, Strip] = LRUCache(1024)
+        self._pending_delta = 0
+        self._move_timer = None
+
+    def set_ids(self, ids: list[int]):
+        """Setzt die angezeigten Scripts; die Markierung bleibt nach Möglichkeit erhalten."""
+        current = self.ids[self.highlighted] if self.ids else None
+        self.ids = ids
+        self._strips.clear()
+        self.virtual_size = Size(self.size.width, len(ids))
+
+        position = bisect_right(ids, current) - 1 if current is not None else -1
+        if position >= 0 and ids[position] == current:
+            self.set_reactive(ScriptList.highlighted, position)
+            self.scroll_to_highlight()
+        else:
+            self.set_reactive(ScriptList.highlighted, 0)
+            self.scroll_home(animate=False)
+        self.refresh()
+
+    def validate_highlighted(self, highlighted: int) -> int:
+        return max(0, min(highlighted, len(self.ids) - 1))
+
+    def watch_highlighted(self, old: int, new: int):
+        top = self.scroll_offset.y
+        if top <= new < top + self.scrollable_content_region.height:
+            # Markierung bleibt im sichtbaren Bereich: nur alte und neue Zeile neu zeichnen
+            self.refresh_line(old)
+            self.refresh_line(new)
+        else:
+            self.scroll_to_highlight()
+            self.refresh()
+
+    def scroll_to_highlight(self):
+        self.scroll_to_region(
+            Region(0, self.highlighted, self.size.width, 1),
+            animate=False, force=True, immediate=True
+        )
+
+    def on_resize(self):
+        self.virtual_size = Size(self.size.width, len(self.ids))
+
+    def render_line(self, y: int) -> Strip:
+        index = self.scroll_offset.y + y
+        width = self.size.width
+        base = self.rich_style
+        if index >= len(self.ids):
+            return Strip.blank(width, base)
+
+        script_idx = self.ids[index]
+        strip = self._strips.get(script_idx)
+        if strip is None:
+            strip = Strip(list(self._line(script_idx).render(self.app.console)))
+            self._strips[script_idx] = strip
+
+        style = base
+        if index == self.highlighted:
+            style = base + self.get_component_rich_style("script-list--highlighted")
+        return strip.crop_extend(0, width, style).apply_style(style)
+
+    def _move(self, delta: int):
+        """Merkt eine Cursor-Bewegung vor (Tastenwiederholung erzeugt viele Events)."""
+        # Begrenzen, damit eine klemmende Taste keine tausend Zeilen aufstaut
+        limit = 3 * max(1, self.scrollable_content_region.height)
+        self._pending_delta = max(-limit, min(self._pending_delta + delta, limit))
+        if self._move_timer is None:
+            self._move_timer = self.set_timer(self.MOVE_INTERVAL, self._apply_move)
+
+    def _apply_move(self):
+        self._move_timer = None
+        delta, self._pending_delta = self._pending_delta, 0
+        if delta:
+            self.highlighted += delta
+
+    def _flush_move(self):
+        if self._move_timer is not None:
+            self._move_timer.stop()
+            self._apply_move()
+
+    def _jump(self, index: int):
+        if self._move_timer is not None:
+            self._move_timer.stop()
+            self._move_timer = None
+        self._pending_delta = 0
+        self.highlighted = index
+
+    def action_cursor_up(self):
+        self._move(-1)
+
+    def action_cursor_down(self):
+        self._move(1)
+
+    def action_first(self):
+        self._jump(0)
+
+    def action_last(self):
+        self._jump(len(self.ids) - 1)
+
+    def action_page_up(self):
+        self._move(-self.scrollable_content_region.height)
+
+    def action_page_down(self):
+        self._move(self.scrollable_content_region.height)
+
+    def action_select(self):
+        self._flush_move()
+        if self.ids:
+            self.post_message(self.Selected(self.ids[self.highlighted]))
+
+    def on_click(self, event: events.Click):
+        offset = event.get_content_offset(self)
+        if offset is None:
+            return
+        index = self.scroll_offset.y + offset.y
+        if index < len(self.ids):
+            self._jump(index)
+            self.action_select()
+
+
+# =============================================================================
+# Code-Ansicht
+# =============================================================================
+
+class CodeView(ScrollView):
+    """Code mit Syntax-Highlighting, gerendert wird nur der sichtbare Ausschnitt.
 
-    # Texte auf Spaltenbreite kürzen und padden
-    db = script.database_name[:w['database']].ljust(w['database'])
-    table = script.table_name[:w['table']].ljust(w['table'])
-    elem = (script.element_name or "(Tabelle)")[:w['element']].ljust(w['element'])
-    typ = script.code_type[:w['type']].ljust(w['type'])
-    cat = script.code_category[:w['category']].ljust(w['category'])
+    Der Code wird einmal komplett gelext (Pygments braucht den Kontext für
+    mehrzeilige Kommentare und Strings), die Zeilen werden aber erst beim
+    Scrollen in den sichtbaren Bereich zu Strips gerendert und gecacht.
+    """
 
-    line = Text()
-    line.append(db, style="cyan")
-    line.append(" │ ", style="dim")
-    line.append(table, style="green")
-    line.append(" │ ", style="dim")
-    line.append(elem, style="yellow")
-    line.append(" │ ", style="dim")
-    line.append(typ, style="magenta")
-    line.append(" │ ", style="dim")
-    line.append(cat, style="blue")
+    DEFAULT_CSS = """
+    CodeView {
+        height: 1fr;
+    }
+    """
 
-    return line
+    THEME = "monokai"
+    TAB_SIZE = 4
+
+    def __init__(self, code: str, **kwargs):
+        super().__init__(**kwargs)
+        syntax = Syntax(code, "javascript", theme=self.THEME, tab_size=self.TAB_SIZE)
+        self._lines = syntax.highlight(code).split("\n", allow_blank=True)
+        if len(self._lines) > 1 and not self._lines[-1].plain:
+            self._lines.pop()
+
+        self._background = Syntax.get_theme(self.THEME).get_background_style()
+        self._number_style = self._background + Style(dim=True)
+        self._number_width = len(str(len(self._lines))) + 1
+        self._strip_cache: LRUCache[int, Strip] = LRUCache(1024)
+
+        for line in self._lines:
+            line.expand_tabs(self.TAB_SIZE)
+        width = max(line.cell_len for line in self._lines) + self._number_width + 2
+        self.virtual_size = Size(width, len(self._lines))
+
+    def _line_strip(self, index: int) -> Strip:
+        strip = self._strip_cache.get(index)
+        if strip is None:
+            segments = [Segment(f"{index + 1:>{self._number_width}} ", self._number_style)]
+            segments.extend(self._lines[index].render(self.app.console))
+            strip = Strip(segments).extend_cell_length(self.virtual_size.width, self._background)
+            self._strip_cache[index] = strip
+        return strip
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        index = scroll_y + y
+        width = self.size.width
+        if index >= len(self._lines):
+            return Strip.blank(width, self._background)
+        strip = self._line_strip(index).crop(scroll_x, scroll_x + width)
+        return strip.extend_cell_length(width, self._background)
 
 
 # =============================================================================
@@ -191,20 +603,7 @@ class NinoxScriptsApp(App):
         padding: 0 1;
     }
 
-    #script-list {
-        height: 1fr;
-    }
-
-    OptionList {
-        height: 1fr;
-        scrollbar-gutter: stable;
-    }
-
-    OptionList > .option-list--option-highlighted {
-        background: $accent;
-    }
-
-    #code-viewer {
+    .code-viewer {
         height: 1fr;
         margin: 1;
         padding: 1;
@@ -229,36 +628,66 @@ class NinoxScriptsApp(App):
         Binding("c", "clear", "Löschen"),
     ]
 
+    # Live-Filter beim Tippen: höchstens ein Filterlauf pro Intervall (Sekunden)
+    FILTER_DEBOUNCE = 0.08
+
+    # Anzahl Spaltenbreiten-Sätze, für die formatierte Zeilen gecacht werden
+    LINE_CACHE_WIDTHS = 4
+
+    # Anzahl gemerkter Filterergebnisse für die schrittweise Eingrenzung
+    FILTER_CACHE_SIZE = 32
+
+    # Anzahl Code-Ansichten, die nach dem Schließen versteckt erhalten bleiben
+    VIEWER_CACHE_SIZE = 16
+
     filter_text = reactive("")
     showing_code = reactive(False)
     filtering = reactive(False)
 
-    def __init__(self, scripts: list[Script], theme: str = "dark"):
+    def __init__(self, scripts: list[Script], theme: str = "dark",
+                 db_path: Optional[str] = None):
         super().__init__()
         self.all_scripts = scripts
+        self.db_path = db_path
         self.filtered_scripts = scripts
-        self.col_widths = self.calculate_widths(scripts)
+        self.filtered_ids = list(range(len(scripts)))
+        self.search_index = get_search_index(scripts)
+        # Textlängen je Spalte, einmal beim Start ermittelt
+        self._col_lens = {
+            "database": [len(s.database_name) for s in scripts],
+            "table": [len(s.table_name) for s in scripts],
+            "element": [len(s.element_name or "(Tabelle)") for s in scripts],
+            "type": [len(s.code_type) for s in scripts],
+            "category": [len(s.code_category) for s in scripts],
+        }
+        self.col_widths = self.calculate_widths(self.filtered_ids)
+        # Formatierte Zeilen je Script-Index, je Satz Spaltenbreiten (die letzten
+        # LINE_CACHE_WIDTHS bleiben erhalten, z.B. ungefiltert und gefiltert)
+        self._line_caches: OrderedDict[tuple, list[Optional[Text]]] = OrderedDict()
+        self._formatted_lines: list[Optional[Text]] = []
+        self._formatted_widths = None
+        # Filtertext -> Treffer-Indizes (zuletzt benutzte am Ende)
+        self._filter_cache: OrderedDict[str, list[int]] = OrderedDict()
+        # Script-ID -> Code-Ansicht; Wiederöffnen spart Laden und Syntax-Highlighting
+        self._viewer_cache: OrderedDict[int, Container] = OrderedDict()
+        self._current_viewer: Optional[Container] = None
         self.theme_name = theme
-
-    def calculate_widths(self, scripts: list[Script]) -> dict:
-        """Berechnet optimale Spaltenbreiten."""
-        w = {"database": 8, "table": 7, "element": 7, "type": 3, "category": 8}
-
-        for s in scripts:
-            w["database"] = max(w["database"], len(s.database_name))
-            w["table"] = max(w["table"], len(s.table_name))
-            elem = s.element_name or "(Tabelle)"
-            w["element"] = max(w["element"], len(elem))
-            w["type"] = max(w["type"], len(s.code_type))
-            w["category"] = max(w["category"], len(s.code_category))
-
-        # Maximalwerte
-        w["database"] = min(w["database"], 25)
-        w["table"] = min(w["table"], 25)
-        w["element"] = min(w["element"], 25)
-        w["type"] = min(w["type"], 12)
-        w["category"] = min(w["category"], 12)
-
+        self._filter_timer = None
+        self._pending_filter = ""
+        self._filter_before = ""
+
+    # Mindest- und Maximalbreite je Spalte
+    MIN_WIDTHS = {"database": 8, "table": 7, "element": 7, "type": 3, "category": 8}
+    MAX_WIDTHS = {"database": 25, "table": 25, "element": 25, "type": 12, "category": 12}
+
+    def calculate_widths(self, ids: list[int]) -> dict:
+        """Berechnet optimale Spaltenbreiten für die Scripts mit den gegebenen Indizes."""
+        full = len(ids) == len(self.all_scripts)
+        w = {}
+        for col, lens in self._col_lens.items():
+            # max über map() läuft ohne Python-Schleife pro Script
+            longest = max(lens if full else map(lens.__getitem__, ids), default=0)
+            w[col] = min(max(self.MIN_WIDTHS[col], longest), self.MAX_WIDTHS[col])
         return w
 
     def compose(self) -> ComposeResult:
@@ -272,28 +701,44 @@ class NinoxScriptsApp(App):
 
         # Header (gleiche Formatierung wie Zeilen)
         w = self.col_widths
-        header = f"{'Datenbank'[:w['database']].ljust(w['database'])} │ {'Tabelle'[:w['table']].ljust(w['table'])} │ {'Element'[:w['element']].ljust(w['element'])} │ {'Typ'[:w['type']].ljust(w['type'])} │ {'Kategorie'[:w['category']].ljust(w['category'])}"
+        fmt, _ = _line_layout(tuple(w[c] for c in LINE_COLUMNS))
+        header = fmt.format("Datenbank", "Tabelle", "Element", "Typ", "Kategorie")
         yield Static(header, id="header-row")
 
-        yield OptionList(id="script-list")
+        yield ScriptList(self.formatted_line, id="script-list")
         yield Static(" ↑↓ Nav │ Enter Code │ f Filter │ c Clear │ q Quit", id="status-bar")
 
     def on_mount(self):
         self.query_one("#filter-container").display = False
         self.refresh_list()
 
+    def formatted_line(self, idx: int) -> Text:
+        """Liefert die formatierte Zeile eines Scripts (gecacht je Spaltenbreite)."""
+        if self._formatted_widths != self.col_widths:
+            self._select_line_cache()
+        line = self._formatted_lines[idx]
+        if line is None:
+            line = format_script_line(self.all_scripts[idx], self.col_widths)
+            self._formatted_lines[idx] = line
+        return line
+
+    def _select_line_cache(self):
+        """Wählt den Zeilen-Cache für die aktuellen Spaltenbreiten (oder legt ihn an)."""
+        key = tuple(self.col_widths.values())
+        caches = self._line_caches
+        lines = caches.pop(key, None)
+        if lines is None:
+            lines = [None] * len(self.all_scripts)
+            if len(caches) >= self.LINE_CACHE_WIDTHS:
+                caches.popitem(last=False)
+        caches[key] = lines
+        self._formatted_lines = lines
+        self._formatted_widths = self.col_widths
+
     def refresh_list(self):
         """Aktualisiert die Script-Liste."""
-        option_list = self.query_one("#script-list", OptionList)
-        option_list.clear_options()
-
-        # Optionen erstellen (effizient, da OptionList virtualisiert)
-        options = []
-        for i, script in enumerate(self.filtered_scripts):
-            line = format_script_line(script, self.col_widths)
-            options.append(Option(line, id=str(i)))
-
-        option_list.add_options(options)
+        # Nur die Indexliste wird ersetzt; gerendert werden die sichtbaren Zeilen
+        self.query_one("#script-list", ScriptList).set_ids(self.filtered_ids)
 
         # Titel aktualisieren
         total = len(self.all_scripts)
@@ -310,51 +755,139 @@ class NinoxScriptsApp(App):
         else:
             self.query_one("#filter-info", Static).update("")
 
+    def set_filter(self, filter_text: str):
+        """Filtert die Liste neu, falls sich der Filtertext geändert hat.
+
+        Bekannte Ergebnisse werden sofort übernommen, neue Suchen laufen im
+        Hintergrund (_run_filter), damit die Oberfläche bedienbar bleibt.
+        """
+        if filter_text == self.filter_text:
+            return
+        self.filter_text = filter_text
+
+        key = filter_text.strip()
+        ids = self._cached_filter_ids(key)
+        if ids is None:
+            self._run_filter(key, self._narrowing_base(key))
+        else:
+            self._commit_filter_results(key, ids)
+
+    @work(exclusive=True, thread=True, group="filter")
+    def _run_filter(self, key: str, base: Optional[list[int]]):
+        """Worker-Thread: sucht den Filter und übergibt das Ergebnis an die App."""
+        ids = filter_indices(self.all_scripts, key, self.search_index, candidates=base)
+        if not get_current_worker().is_cancelled:
+            self.call_from_thread(self._commit_filter_results, key, ids)
+
+    def _commit_filter_results(self, key: str, ids: list[int]):
+        """Übernimmt ein Filterergebnis, sofern es zum aktuellen Filter passt."""
+        if key != self.filter_text.strip():
+            return
+        if key:
+            self._remember_filter(key, ids)
+
+        self.filtered_ids = ids
+        if key:
+            self.filtered_scripts = [self.all_scripts[i] for i in ids]
+        else:
+            self.filtered_scripts = self.all_scripts
+
+        # Beim Tippen bleiben die Spalten stehen (Treffer werden nur weniger,
+        # die Breiten können also nur schrumpfen); angepasst wird erst danach
+        if not self.filtering:
+            self.col_widths = self.calculate_widths(ids)
+        self.refresh_list()
+
+    def fit_widths(self):
+        """Passt die Spaltenbreiten an die aktuell gefilterten Scripts an."""
+        widths = self.calculate_widths(self.filtered_ids)
+        if widths != self.col_widths:
+            self.col_widths = widths
+            self.refresh_list()
+
+    def _cached_filter_ids(self, key: str) -> Optional[list[int]]:
+        """Gemerkte Treffer eines Filters (leerer Filter: alle Scripts)."""
+        if not key:
+            return list(range(len(self.all_scripts)))
+        ids = self._filter_cache.get(key)
+        if ids is not None:
+            self._filter_cache.move_to_end(key)
+        return ids
+
+    def _narrowing_base(self, key: str) -> Optional[list[int]]:
+        """Kleinstes gemerktes Ergebnis eines weiteren Filters als Ausgangsmenge."""
+        base = None
+        for text, cached in self._filter_cache.items():
+            if (base is None or len(cached) < len(base)) and filter_implies(key, text):
+                base = cached
+        return base
+
+    def _remember_filter(self, key: str, ids: list[int]):
+        cache = self._filter_cache
+        cache.pop(key, None)
+        if len(cache) >= self.FILTER_CACHE_SIZE:
+            cache.popitem(last=False)
+        cache[key] = ids
+
+    def filtered_ids_for(self, filter_text: str) -> list[int]:
+        """Treffer eines Filters (synchron); grenzt nach Möglichkeit ein früheres Ergebnis ein."""
+        key = filter_text.strip()
+        ids = self._cached_filter_ids(key)
+        if ids is None:
+            ids = filter_indices(self.all_scripts, key, self.search_index,
+                                 candidates=self._narrowing_base(key))
+        if key:
+            self._remember_filter(key, ids)
+        return ids
+
+    def _cancel_filter_timer(self):
+        if self._filter_timer is not None:
+            self._filter_timer.stop()
+            self._filter_timer = None
+
+    def _apply_pending_filter(self):
+        """Timer-Callback: wendet den zuletzt eingegebenen Filter an."""
+        self._filter_timer = None
+        self.set_filter(self._pending_filter)
+
+    def on_input_changed(self, event: Input.Changed):
+        """Live-Filter: alle Eingaben eines Intervalls werden zu einem Filterlauf gebündelt."""
+        event.stop()
+        if not self.filtering:
+            return
+        self._pending_filter = event.value
+        if self._filter_timer is None:
+            self._filter_timer = self.set_timer(self.FILTER_DEBOUNCE, self._apply_pending_filter)
+
     def action_filter(self):
         if not self.showing_code:
             self.filtering = True
+            self._filter_before = self.filter_text
             self.query_one("#filter-container").display = True
             self.query_one("#filter-input", Input).focus()
 
     def action_clear(self):
         if not self.showing_code and not self.filtering:
-            self.filter_text = ""
-            self.filtered_scripts = self.all_scripts
-            self.col_widths = self.calculate_widths(self.all_scripts)
-            self.refresh_list()
+            self.query_one("#filter-input", Input).value = ""
+            self.set_filter("")
 
     def action_select(self):
         if self.filtering:
             # Filter anwenden
-            self.filter_text = self.query_one("#filter-input", Input).value
+            self._cancel_filter_timer()
             self.filtering = False
             self.query_one("#filter-container").display = False
-
-            if self.filter_text:
-                self.filtered_scripts = filter_scripts(self.all_scripts, self.filter_text)
-            else:
-                self.filtered_scripts = self.all_scripts
-
-            self.col_widths = self.calculate_widths(self.filtered_scripts)
-            self.refresh_list()
-            self.query_one("#script-list", OptionList).focus()
+            self.set_filter(self.query_one("#filter-input", Input).value)
+            self.fit_widths()
+            self.query_one("#script-list", ScriptList).focus()
         elif not self.showing_code and self.filtered_scripts:
             # Code anzeigen
-            option_list = self.query_one("#script-list", OptionList)
-            highlighted = option_list.highlighted
-            if highlighted is None:
-                return
-
-            idx = int(option_list.get_option_at_index(highlighted).id)
-            script = self.filtered_scripts[idx]
-            self.show_code(script)
+            self.query_one("#script-list", ScriptList).action_select()
 
-    def on_option_list_option_selected(self, event: OptionList.OptionSelected):
-        """Wird aufgerufen wenn eine Option mit Enter ausgewählt wird."""
+    def on_script_list_selected(self, event: ScriptList.Selected):
+        """Wird aufgerufen wenn ein Script mit Enter oder Klick ausgewählt wird."""
         if not self.showing_code and self.filtered_scripts:
-            idx = int(event.option.id)
-            script = self.filtered_scripts[idx]
-            self.show_code(script)
+            self.show_code(self.all_scripts[event.index])
 
     def show_code(self, script: Script):
         """Zeigt den Code eines Scripts an."""
@@ -374,27 +907,46 @@ class NinoxScriptsApp(App):
 ═══════════════════════════════════════════════════════════
 
 """
-        syntax = Syntax(script.code, "javascript", theme="monokai", line_numbers=True)
-
-        viewer = ScrollableContainer(
-            Static(Text(header, style="bold bright_cyan")),
-            Static(syntax),
-            id="code-viewer"
-        )
-        self.mount(viewer)
+        viewer = self._viewer_cache.get(script.id)
+        if viewer is not None:
+            self._viewer_cache.move_to_end(script.id)
+            viewer.display = True
+            code_view = viewer.query_one(CodeView)
+        else:
+            code = script.code if script.code is not None else load_code(self.db_path, script.id)
+
+            code_view = CodeView(code)
+            viewer = Container(
+                Static(Text(header, style="bold bright_cyan")),
+                code_view,
+                classes="code-viewer"
+            )
+            self.mount(viewer)
+            self._viewer_cache[script.id] = viewer
+            while len(self._viewer_cache) > self.VIEWER_CACHE_SIZE:
+                _, oldest = self._viewer_cache.popitem(last=False)
+                oldest.remove()
+        self._current_viewer = viewer
+        self.call_after_refresh(code_view.focus)
 
         self.query_one("#title-bar", Static).update(f" Code: {script.element_name or script.table_name}")
         self.query_one("#status-bar", Static).update(" ↑↓ Scroll │ Esc/Enter Zurück │ q Beenden")
 
     def action_back(self):
         if self.filtering:
+            # Abbrechen: Live-Filter auf den Stand vor der Eingabe zurücksetzen
+            self._cancel_filter_timer()
             self.filtering = False
             self.query_one("#filter-container").display = False
-            self.query_one("#script-list", OptionList).focus()
+            self.query_one("#filter-input", Input).value = self._filter_before
+            self.set_filter(self._filter_before)
+            self.fit_widths()
+            self.query_one("#script-list", ScriptList).focus()
         elif self.showing_code:
             self.showing_code = False
-            viewer = self.query_one("#code-viewer")
-            viewer.remove()
+            if self._current_viewer is not None:
+                self._current_viewer.display = False
+                self._current_viewer = None
 
             self.query_one("#script-list").display = True
             self.query_one("#header-row").display = True
@@ -408,7 +960,7 @@ class NinoxScriptsApp(App):
                 title = f" Ninox Scripts ({total})"
             self.query_one("#title-bar", Static).update(title)
             self.query_one("#status-bar", Static).update(" ↑↓ Nav │ Enter Code │ f Filter │ c Clear │ q Quit")
-            self.query_one("#script-list", OptionList).focus()
+            self.query_one("#script-list", ScriptList).focus()
 
     def on_input_submitted(self, event: Input.Submitted):
         event.stop()
@@ -482,7 +1034,7 @@ def main():
         print("Keine Scripts gefunden.")
         sys.exit(0)
 
-    app = NinoxScriptsApp(scripts, theme)
+    app = NinoxScriptsApp(scripts, theme, db_path)
     app.run()
 
 
@@ -15,10 +15,12 @@ Verwendung:
     ./ninox_tui.py [database.db]
 """
 
+import os
 import sys
-import sqlite3
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, NamedTuple, Tuple
 
 from textual import on, work
 from textual.app import App, ComposeResult
@@ -32,6 +34,7 @@ from textual.widgets import (
     LoadingIndicator, Rule, Placeholder,
 )
 from textual.widget import Widget
+from textual.worker import get_current_worker
 from rich.syntax import Syntax
 from rich.text import Text
 from rich.panel import Panel
@@ -39,16 +42,120 @@ from rich.panel import Panel
 # Import aus bestehendem Modul
 from ninox_api_extractor import (
     NinoxSchemaExtractor,
+    connect_readonly,
     get_code_preview,
 )
 
 DEFAULT_DB = "ninox_schema.db"
 
+# Memory-Mapping für die TUI: 512 MB, damit die ganze DB gemappt ist
+TUI_MMAP_SIZE = 536870912
+
+# Suchergebnisse: Trefferlimit und Anzahl gemerkter Suchen (LRU)
+SEARCH_LIMIT = 50
+SEARCH_CACHE_SIZE = 64
+# Wartezeit nach Eingabe/Enter, bevor die Suche startet (Sekunden)
+SEARCH_DEBOUNCE = 0.15
+
+# Feste SQL-Texte, damit SQLite die vorbereiteten Statements wiederverwendet
+SQL_LOAD_FIELDS = """
+    SELECT IFNULL(NULLIF(caption, ''), name), field_id, IFNULL(base_type, ''),
+           IFNULL(ref_table_name, ''), has_formula
+    FROM fields
+    WHERE database_id = ? AND table_id = ?
+    ORDER BY name
+"""
+
+SQL_LOAD_SCRIPTS = """
+    SELECT id, element_name, code_type, line_count FROM scripts
+    WHERE database_id = ? AND table_name = ?
+    ORDER BY code_type, element_name
+"""
+
+SQL_LOAD_CODE = "SELECT code FROM scripts WHERE id = ?"
+
+# Zeilen pro fetchmany-Block beim Füllen der Detail-Tabellen
+FETCH_CHUNK = 500
+
+
+def open_reader(db_path: str) -> NinoxSchemaExtractor:
+    """Öffnet einen lesenden Extractor mit eigener Verbindung.
+
+    SQLite-Verbindungen sind an ihren Thread gebunden, Worker-Threads
+    brauchen daher jeweils einen eigenen Extractor.
+    """
+    reader = NinoxSchemaExtractor(None, db_path)
+    reader.conn = connect_readonly(db_path, mmap_size=TUI_MMAP_SIZE)
+    return reader
+
+
+# Lesende Extractors der Worker-Threads: {db_path: (generation, reader)}
+_thread_readers = threading.local()
+_reader_generation = 0
+
+
+def thread_reader(db_path: str) -> NinoxSchemaExtractor:
+    """Liefert den Extractor des aktuellen Worker-Threads.
+
+    Worker laufen im Thread-Pool des Event-Loops; jeder Thread behält seine
+    Verbindung (samt Statement- und Page-Cache) über mehrere Aufgaben hinweg.
+    Nach reset_thread_readers() wird sie beim nächsten Zugriff neu geöffnet.
+    """
+    readers = getattr(_thread_readers, "readers", None)
+    if readers is None:
+        readers = _thread_readers.readers = {}
+
+    entry = readers.get(db_path)
+    if entry is not None and entry[0] == _reader_generation:
+        return entry[1]
+    if entry is not None:
+        entry[1].close()
+
+    reader = open_reader(db_path)
+    readers[db_path] = (_reader_generation, reader)
+    return reader
+
+
+def reset_thread_readers() -> None:
+    """Verwirft die Verbindungen der Worker-Threads (z.B. nach neuer Extraktion)"""
+    global _reader_generation
+    _reader_generation += 1
+
+
+def clear_rows(table: DataTable) -> None:
+    """Leert eine DataTable, behält aber ihre Spalten.
+
+    Die automatische Spaltenbreite wächst nur mit dem Inhalt; sie wird hier
+    auf die Breite der Überschrift zurückgesetzt.
+    """
+    table.clear()
+    for column in table.columns.values():
+        column.content_width = column.width
+
 
 # =============================================================================
 # Custom Widgets
 # =============================================================================
 
+class LexedSyntax(Syntax):
+    """Syntax, das den Code nur beim ersten Rendern lext.
+
+    Rich lext bei jedem Rendern (Größenänderung, Scrollen, Refresh) erneut;
+    hier wird das Ergebnis gemerkt und als Kopie zurückgegeben, weil Rich den
+    Text beim Umbrechen verändert.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lexed: Optional[Tuple[Any, Text]] = None
+
+    def highlight(self, code: str, line_range=None) -> Text:
+        key = (code, line_range)
+        if self._lexed is None or self._lexed[0] != key:
+            self._lexed = (key, super().highlight(code, line_range))
+        return self._lexed[1].copy()
+
+
 class CodeViewer(Static):
     """Widget für Code mit Syntax-Highlighting"""
 
@@ -61,21 +168,33 @@ class CodeViewer(Static):
     }
     """
 
+    # Anzahl gemerkter, bereits gelexter Scripts
+    SYNTAX_CACHE_SIZE = 16
+
     def __init__(self, code: str = "", language: str = "javascript", **kwargs):
         super().__init__(**kwargs)
         self._code = code
         self._language = language
+        self._syntax_cache: "OrderedDict[str, LexedSyntax]" = OrderedDict()
 
     def update_code(self, code: str, title: str = ""):
         """Aktualisiert den angezeigten Code"""
         self._code = code
-        syntax = Syntax(
-            code or "// Kein Code",
-            self._language,
-            theme="monokai",
-            line_numbers=True,
-            word_wrap=True,
-        )
+        code = code or "// Kein Code"
+        syntax = self._syntax_cache.get(code)
+        if syntax is None:
+            syntax = LexedSyntax(
+                code,
+                self._language,
+                theme="monokai",
+                line_numbers=True,
+                word_wrap=True,
+            )
+            self._syntax_cache[code] = syntax
+            while len(self._syntax_cache) > self.SYNTAX_CACHE_SIZE:
+                self._syntax_cache.popitem(last=False)
+        else:
+            self._syntax_cache.move_to_end(code)
         self.update(Panel(syntax, title=title, border_style="cyan"))
 
 
@@ -107,7 +226,24 @@ class StatsPanel(Static):
 # Search Screen (Modal)
 # =============================================================================
 
-class SearchScreen(ModalScreen[Optional[Dict]]):
+class SearchHit(NamedTuple):
+    """Ein Suchtreffer mit den Feldern, die Trefferliste und Code-Ansicht brauchen"""
+    table_name: Optional[str]
+    element_name: Optional[str]
+    code_type: str
+    code: str
+    loc: str
+    preview: str
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "SearchHit":
+        return cls(
+            row['table_name'], row['element_name'], row['code_type'],
+            row['code'], row['loc'], get_code_preview(row['code'], 40),
+        )
+
+
+class SearchScreen(ModalScreen[Optional[SearchHit]]):
     """Modal-Screen für die Suche"""
 
     BINDINGS = [
@@ -155,10 +291,14 @@ class SearchScreen(ModalScreen[Optional[Dict]]):
     }
     """
 
-    def __init__(self, extractor: NinoxSchemaExtractor):
+    def __init__(self, extractor: NinoxSchemaExtractor, cache: "OrderedDict[str, List[SearchHit]]"):
         super().__init__()
         self.extractor = extractor
+        self.cache = cache
         self.results = []
+        self._search_timer = None
+        # Zuletzt gestartete bzw. angezeigte Suche
+        self._last_query: Optional[str] = None
 
     def compose(self) -> ComposeResult:
         with Vertical():
@@ -176,27 +316,78 @@ class SearchScreen(ModalScreen[Optional[Dict]]):
         table.cursor_type = "row"
         self.query_one("#search-input", Input).focus()
 
-    @on(Button.Pressed, "#btn-search")
+    @on(Input.Changed, "#search-input")
     @on(Input.Submitted)
+    @on(Button.Pressed, "#btn-search")
+    def schedule_search(self) -> None:
+        """Startet die Suche verzögert; Tippen oder Enter innerhalb der Wartezeit verschiebt sie"""
+        if self._search_timer is not None:
+            self._search_timer.stop()
+        self._search_timer = self.set_timer(SEARCH_DEBOUNCE, self.do_search)
+
     def do_search(self) -> None:
+        self._search_timer = None
         query = self.query_one("#search-input", Input).value
-        if not query:
+        if not query or query == self._last_query:
             return
+        self._last_query = query
 
-        self.results = self.extractor.search_scripts(query, limit=50)
+        cached = self.cache.get(query)
+        if cached is not None:
+            self.cache.move_to_end(query)
+            self.workers.cancel_group(self, "search")
+            self._show_results(cached)
+            return
 
-        table = self.query_one("#results", DataTable)
-        table.clear()
+        self.results = []
+        clear_rows(self.query_one("#results", DataTable))
+        self.query_one("#result-count", Static).update("[dim]Suche läuft…[/dim]")
+        self._run_search(query)
+
+    @work(exclusive=True, thread=True, group="search")
+    def _run_search(self, query: str) -> None:
+        """Worker: streamt die Treffer blockweise in die Tabelle (neue Suche bricht alte ab)"""
+        worker = get_current_worker()
+        results = []
+        reader = thread_reader(self.extractor.db_path)
+        for rows in reader.iter_search_scripts(query, limit=SEARCH_LIMIT):
+            if worker.is_cancelled:
+                return
+            chunk = [SearchHit.from_row(row) for row in rows]
+            results.extend(chunk)
+            self.app.call_from_thread(self._append_results, chunk, worker)
+
+        self.app.call_from_thread(self._finish_results, results, query, worker)
+
+    def _append_results(self, chunk: List[SearchHit], worker=None) -> None:
+        """Hängt einen Block Treffer an die Tabelle an"""
+        if worker is not None and worker.is_cancelled:
+            return
+
+        rows = [(hit.loc, hit.code_type, hit.preview) for hit in chunk]
 
-        count_label = self.query_one("#result-count", Static)
-        count_label.update(f"[cyan]{len(self.results)}[/cyan] Treffer")
+        self.results.extend(chunk)
+        with self.app.batch_update():
+            self.query_one("#results", DataTable).add_rows(rows)
+        self.query_one("#result-count", Static).update(f"[cyan]{len(self.results)}+[/cyan] Treffer…")
 
-        for r in self.results:
-            loc = f"{r['database_name'][:20]}.{(r['table_name'] or 'DB')[:15]}"
-            if r['element_name']:
-                loc += f".{r['element_name'][:10]}"
-            preview = get_code_preview(r['code'], 40)
-            table.add_row(loc, r['code_type'], preview)
+    def _finish_results(self, results: List[SearchHit], query: str, worker=None) -> None:
+        """Schließt eine Suche ab und merkt die Treffer im Cache"""
+        if worker is not None and worker.is_cancelled:
+            return
+
+        self.cache[query] = results
+        while len(self.cache) > SEARCH_CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+        self.query_one("#result-count", Static).update(f"[cyan]{len(results)}[/cyan] Treffer")
+
+    def _show_results(self, results: List[SearchHit]) -> None:
+        """Zeigt gemerkte Suchergebnisse komplett an"""
+        self.results = []
+        clear_rows(self.query_one("#results", DataTable))
+        self._append_results(results)
+        self.query_one("#result-count", Static).update(f"[cyan]{len(results)}[/cyan] Treffer")
 
     @on(Button.Pressed, "#btn-cancel")
     def action_cancel(self) -> None:
@@ -204,10 +395,9 @@ class SearchScreen(ModalScreen[Optional[Dict]]):
 
     @on(DataTable.RowSelected)
     def on_row_selected(self, event: DataTable.RowSelected) -> None:
-        if event.row_key and self.results:
-            idx = event.row_key.value
-            if isinstance(idx, int) and idx < len(self.results):
-                self.dismiss(self.results[idx])
+        idx = event.cursor_row
+        if self.results and idx < len(self.results):
+            self.dismiss(self.results[idx])
 
 
 # =============================================================================
@@ -355,6 +545,13 @@ class NinoxTUI(App):
         Binding("?", "help", "Hilfe"),
     ]
 
+    # Spalten der Detail-Tabellen, einmalig in on_mount angelegt
+    TABLE_COLUMNS = {
+        "#fields-table": ("Name", "ID", "Typ", "Referenz", "Formel"),
+        "#scripts-table": ("Element", "Typ", "Zeilen"),
+        "#deps-table": ("Richtung", "Feld", "Ziel/Quelle", "Typ"),
+    }
+
     def __init__(self, db_path: str = DEFAULT_DB):
         super().__init__()
         self.db_path = db_path
@@ -362,6 +559,10 @@ class NinoxTUI(App):
         self.current_db: Optional[Dict] = None
         self.current_table: Optional[Dict] = None
         self.current_script: Optional[Dict] = None
+        # Suchbegriff -> Treffer, wird beim (Neu-)Laden der DB geleert
+        self.search_cache: "OrderedDict[str, List[SearchHit]]" = OrderedDict()
+        # (mtime_ns, Größe) der geladenen DB-Datei, für action_refresh
+        self._db_signature: Optional[Tuple[int, int]] = None
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -396,54 +597,91 @@ class NinoxTUI(App):
 
     def on_mount(self) -> None:
         """Wird beim Start aufgerufen"""
+        for table_id, columns in self.TABLE_COLUMNS.items():
+            table = self.query_one(table_id, DataTable)
+            table.add_columns(*columns)
+            table.cursor_type = "row"
+
         self.load_database()
 
     def load_database(self) -> None:
         """Lädt die SQLite-Datenbank"""
-        if not Path(self.db_path).exists():
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
             self.notify(f"Datenbank nicht gefunden: {self.db_path}", severity="error")
             return
+        self._db_signature = (stat.st_mtime_ns, stat.st_size)
+
+        if self.extractor:
+            self.extractor.close()
+        reset_thread_readers()
 
         try:
-            self.extractor = NinoxSchemaExtractor(None, self.db_path)
-            self.extractor.conn = sqlite3.connect(self.db_path)
-            self.extractor.conn.row_factory = sqlite3.Row
-            self.populate_tree()
-            self.update_stats()
-            self.notify(f"Geladen: {self.db_path}")
+            self.extractor = open_reader(self.db_path)
         except Exception as e:
             self.notify(f"Fehler: {e}", severity="error")
+            return
 
-    def populate_tree(self) -> None:
-        """Füllt den Datenbank-Baum"""
-        if not self.extractor:
+        self.search_cache.clear()
+
+        self._load_overview()
+
+    @work(exclusive=True, thread=True, group="load")
+    def _load_overview(self) -> None:
+        """Worker: liest Datenbanken, Tabellen und Statistiken im Hintergrund"""
+        try:
+            reader = thread_reader(self.db_path)
+            # Alle Tabellen in einer Abfrage statt einer pro Datenbank
+            tables_by_db: Dict[str, List[Dict]] = {}
+            for table in reader.list_tables():
+                tables_by_db.setdefault(table['database_id'], []).append(table)
+            databases = [(db, tables_by_db.get(db['id'], [])) for db in reader.list_databases()]
+            stats = reader.get_statistics()
+        except Exception as e:
+            self.call_from_thread(self.notify, f"Fehler: {e}", severity="error")
             return
 
+        if not get_current_worker().is_cancelled:
+            self.call_from_thread(self._show_overview, databases, stats)
+
+    def _show_overview(self, databases: List[Tuple[Dict, List[Dict]]], stats: Dict[str, Any]) -> None:
+        """Übernimmt die im Hintergrund geladenen Daten in die Oberfläche"""
+        self.populate_tree(databases)
+        self.update_stats(stats)
+        self.notify(f"Geladen: {self.db_path}")
+
+    def populate_tree(self, databases: List[Tuple[Dict, List[Dict]]]) -> None:
+        """Füllt den Datenbank-Baum"""
         tree = self.query_one("#db-tree", Tree)
         tree.clear()
         tree.root.expand()
 
-        databases = self.extractor.list_databases()
-
-        for db in databases:
-            db_node = tree.root.add(
+        # Tabellen-Knoten entstehen erst beim Aufklappen (on_tree_node_expanded)
+        for db, tables in databases:
+            tree.root.add(
                 f"📁 {db['name']} ({db['table_count']})",
-                data={"type": "database", "data": db}
+                data={"type": "database", "data": db, "tables": tables},
+                allow_expand=bool(tables),
             )
 
-            tables = self.extractor.list_tables(db['id'])
-            for table in tables:
-                db_node.add_leaf(
-                    f"📋 {table['name']} ({table['field_count']})",
-                    data={"type": "table", "data": table, "db": db}
-                )
-
-    def update_stats(self) -> None:
-        """Aktualisiert das Statistik-Panel"""
-        if not self.extractor:
+    @on(Tree.NodeExpanded)
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        """Fügt die Tabellen einer Datenbank beim ersten Aufklappen ein"""
+        node = event.node
+        node_data = node.data
+        if not node_data or node_data["type"] != "database" or node.children:
             return
 
-        stats = self.extractor.get_statistics()
+        db = node_data["data"]
+        for table in node_data["tables"]:
+            node.add_leaf(
+                f"📋 {table['name']} ({table['field_count']})",
+                data={"type": "table", "data": table, "db": db}
+            )
+
+    def update_stats(self, stats: Dict[str, Any]) -> None:
+        """Aktualisiert das Statistik-Panel"""
         panel = self.query_one("#stats-panel", StatsPanel)
         panel.update_stats(stats)
 
@@ -475,9 +713,8 @@ class NinoxTUI(App):
 
     def clear_tables(self) -> None:
         """Leert alle Tabellen"""
-        for table_id in ["#fields-table", "#scripts-table", "#deps-table"]:
-            table = self.query_one(table_id, DataTable)
-            table.clear(columns=True)
+        for table_id in self.TABLE_COLUMNS:
+            clear_rows(self.query_one(table_id, DataTable))
 
         viewer = self.query_one("#code-viewer", CodeViewer)
         viewer.update_code("", "Code")
@@ -494,50 +731,44 @@ class NinoxTUI(App):
     def load_fields(self) -> None:
         """Lädt Felder"""
         cursor = self.extractor.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM fields
-            WHERE database_id = ? AND table_id = ?
-            ORDER BY name
-        """, (self.current_db['id'], self.current_table['table_id']))
-
-        fields = [dict(row) for row in cursor.fetchall()]
+        cursor.row_factory = None
+        cursor.execute(SQL_LOAD_FIELDS, (self.current_db['id'], self.current_table['table_id']))
 
         table = self.query_one("#fields-table", DataTable)
-        table.clear(columns=True)
-        table.add_columns("Name", "ID", "Typ", "Referenz", "Formel")
-        table.cursor_type = "row"
-
-        for f in fields:
-            table.add_row(
-                f['caption'] or f['name'],
-                f['field_id'],
-                f['base_type'] or "",
-                f['ref_table_name'] or "",
-                "✓" if f['has_formula'] else "",
-            )
+        clear_rows(table)
+
+        with self.batch_update():
+            while True:
+                chunk = cursor.fetchmany(FETCH_CHUNK)
+                if not chunk:
+                    break
+                table.add_rows(
+                    (label, field_id, base_type, ref_table, "✓" if has_formula else "")
+                    for label, field_id, base_type, ref_table, has_formula in chunk
+                )
 
     def load_scripts(self) -> None:
         """Lädt Scripts"""
         cursor = self.extractor.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM scripts
-            WHERE database_id = ? AND table_name = ?
-            ORDER BY code_type, element_name
-        """, (self.current_db['id'], self.current_table['name']))
+        cursor.execute(SQL_LOAD_SCRIPTS, (self.current_db['id'], self.current_table['name']))
 
-        self.scripts = [dict(row) for row in cursor.fetchall()]
+        # sqlite3.Row erlaubt Zugriff per Spaltenname, ohne Kopie in ein dict;
+        # der Code selbst wird erst bei Auswahl geladen (SQL_LOAD_CODE)
+        self.scripts = cursor.fetchall()
 
         table = self.query_one("#scripts-table", DataTable)
-        table.clear(columns=True)
-        table.add_columns("Element", "Typ", "Zeilen")
-        table.cursor_type = "row"
+        clear_rows(table)
 
-        for s in self.scripts:
-            table.add_row(
+        rows = [
+            (
                 s['element_name'] or "(Tabelle)",
                 s['code_type'],
                 str(s['line_count']),
             )
+            for s in self.scripts
+        ]
+        with self.batch_update():
+            table.add_rows(rows)
 
     def load_dependencies(self) -> None:
         """Lädt Abhängigkeiten"""
@@ -547,25 +778,18 @@ class NinoxTUI(App):
         deps = self.extractor.get_table_dependencies(self.current_table['name'])
 
         table = self.query_one("#deps-table", DataTable)
-        table.clear(columns=True)
-        table.add_columns("Richtung", "Feld", "Ziel/Quelle", "Typ")
-        table.cursor_type = "row"
-
-        for ref in deps['references']:
-            table.add_row(
-                "→",
-                ref['source_field_name'],
-                ref['target_table_name'],
-                ref['relationship_type']
-            )
-
-        for ref in deps['referenced_by']:
-            table.add_row(
-                "←",
-                ref['source_field_name'],
-                ref['source_table_name'],
-                ref['relationship_type']
-            )
+        clear_rows(table)
+
+        rows = [
+            ("→", ref['source_field_name'], ref['target_table_name'], ref['relationship_type'])
+            for ref in deps['references']
+        ]
+        rows += [
+            ("←", ref['source_field_name'], ref['source_table_name'], ref['relationship_type'])
+            for ref in deps['referenced_by']
+        ]
+        with self.batch_update():
+            table.add_rows(rows)
 
     @on(DataTable.RowSelected, "#scripts-table")
     def on_script_selected(self, event: DataTable.RowSelected) -> None:
@@ -580,7 +804,8 @@ class NinoxTUI(App):
 
             title = f"{script['element_name'] or 'Tabelle'} - {script['code_type']}"
             viewer = self.query_one("#code-viewer", CodeViewer)
-            viewer.update_code(script['code'], title)
+            code = self.extractor.conn.execute(SQL_LOAD_CODE, (script['id'],)).fetchone()
+            viewer.update_code(code[0] if code else "", title)
 
     def action_search(self) -> None:
         """Öffnet den Such-Dialog"""
@@ -588,17 +813,26 @@ class NinoxTUI(App):
             self.notify("Keine Datenbank geladen", severity="warning")
             return
 
-        def handle_result(result: Optional[Dict]) -> None:
+        def handle_result(result: Optional[SearchHit]) -> None:
             if result:
                 viewer = self.query_one("#code-viewer", CodeViewer)
-                title = f"{result['table_name']}.{result['element_name'] or result['code_type']}"
-                viewer.update_code(result['code'], title)
+                title = f"{result.table_name}.{result.element_name or result.code_type}"
+                viewer.update_code(result.code, title)
                 self.query_one("#tab-content", TabbedContent).active = "tab-scripts"
 
-        self.push_screen(SearchScreen(self.extractor), handle_result)
+        self.push_screen(SearchScreen(self.extractor, self.search_cache), handle_result)
 
     def action_refresh(self) -> None:
-        """Aktualisiert die Ansicht"""
+        """Aktualisiert die Ansicht, wenn sich die DB-Datei geändert hat"""
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            stat = None
+        if (stat is not None and self.extractor and self.extractor.conn
+                and (stat.st_mtime_ns, stat.st_size) == self._db_signature):
+            self.notify("Datenbank unverändert")
+            return
+
         self.load_database()
 
     def action_toggle_sidebar(self) -> None:
@@ -3,9 +3,14 @@
 Ninox Database Viewer - Textual TUI
 """
 
+import re
 import sqlite3
 import sys
 import subprocess
+from collections import OrderedDict, deque
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
 
 from textual.app import App, ComposeResult
@@ -16,7 +21,12 @@ from textual.widgets import (
     Label, ListView, ListItem, TextArea, TabbedContent, TabPane
 )
 from textual.screen import Screen, ModalScreen
-from textual import events
+from textual import events, work
+from textual.worker import get_current_worker
+from rich.markup import escape
+
+# Der Viewer liest nur; die Extraktion schreibt in einem eigenen Prozess
+from ninox_api_extractor import connect_readonly
 
 # Pfade
 SCRIPT_DIR = Path(__file__).parent
@@ -24,63 +34,189 @@ DEFAULT_DB = SCRIPT_DIR / "ninoxstructur.db"
 CONFIG_FILE = SCRIPT_DIR / "config.yaml"
 EXTRACTOR = SCRIPT_DIR / "ninox_api_extractor.py"
 
+# Trennung von Suchbegriffen an AND / OR
+_AND_RE = re.compile(r'\s+AND\s+', re.IGNORECASE)
+_OR_RE = re.compile(r'\s+OR\s+', re.IGNORECASE)
+_WORD_RE = re.compile(r'\w')
+_LIKE_ESCAPE_RE = re.compile(r'[\\%_]')
+
+# Wartezeit (Sekunden) nach dem letzten Tastendruck, bevor gesucht wird
+SEARCH_DEBOUNCE = 0.2
+
+
+def clean_code(code: str) -> str:
+    """Wandelt maskierte Zeilenumbrüche/Tabs (\\n, \\t) in echte um.
+
+    Code ohne Backslash (der Normalfall) wird unverändert zurückgegeben,
+    ohne ihn zweimal komplett zu durchsuchen.
+    """
+    if not code or '\\' not in code:
+        return code or ''
+    return code.replace('\\n', '\n').replace('\\t', '\t')
+
+
+def iter_lines(code: str):
+    """Liefert die Zeilen wie code.split('\\n'), aber erst bei Bedarf"""
+    pos = 0
+    while True:
+        end = code.find('\n', pos)
+        if end < 0:
+            yield code[pos:]
+            return
+        yield code[pos:end]
+        pos = end + 1
+
+
+@lru_cache(maxsize=1)
+def _yaml():
+    """PyYAML erst beim ersten Zugriff auf die Config importieren.
+
+    Liefert (Modul, Loader, Dumper) mit den LibYAML-Bindings, falls PyYAML
+    damit gebaut wurde, oder (None, None, None) ohne PyYAML.
+    """
+    try:
+        import yaml
+    except ImportError:
+        return None, None, None
+    return (yaml, getattr(yaml, 'CSafeLoader', yaml.SafeLoader),
+            getattr(yaml, 'CSafeDumper', yaml.SafeDumper))
+
+
+# Zuletzt gelesene Konfiguration: (mtime_ns, Größe) der Datei und Ergebnis
+_CFG_CACHE = {'stat': None, 'value': {}}
+
 
 def load_config() -> dict:
-    if not CONFIG_FILE.exists():
+    yaml, loader, _ = _yaml()
+    if yaml is None:
         return {}
     try:
-        import yaml
-        with open(CONFIG_FILE) as f:
-            config = yaml.safe_load(f)
-        return config.get('environments', {}) if config else {}
-    except:
+        st = CONFIG_FILE.stat()
+    except OSError:
+        return {}
+    signature = (st.st_mtime_ns, st.st_size)
+    if signature == _CFG_CACHE['stat']:
+        return _CFG_CACHE['value']
+    try:
+        with open(CONFIG_FILE, 'rb') as f:
+            config = yaml.load(f, Loader=loader)
+        environments = config.get('environments', {}) if config else {}
+    except (OSError, yaml.YAMLError, AttributeError):
+        # AttributeError: Datei enthält kein Mapping
         return {}
+    _CFG_CACHE['stat'], _CFG_CACHE['value'] = signature, environments
+    return environments
 
 
 def save_config(environments: dict) -> bool:
+    yaml, _, dumper = _yaml()
+    if yaml is None:
+        return False
     try:
-        import yaml
-        with open(CONFIG_FILE, 'w') as f:
-            yaml.dump({'environments': environments}, f, default_flow_style=False, allow_unicode=True)
+        with open(CONFIG_FILE, 'wb') as f:
+            yaml.dump({'environments': environments}, f, Dumper=dumper, encoding='utf-8',
+                      default_flow_style=False, allow_unicode=True)
+        _CFG_CACHE['stat'] = None
         return True
-    except:
+    except (OSError, yaml.YAMLError):
         return False
 
 
+@lru_cache(maxsize=32)
+def _like_search_sql(operator: str, n_terms: int) -> str:
+    """LIKE-Suche für n Begriffe; gleicher Text je Form, damit sqlite3 das
+    vorbereitete Statement aus seinem Cache wiederverwendet.
+
+    Die kurzen Namensspalten stehen vor code: SQLite bricht das OR beim
+    ersten Treffer ab und durchsucht den Code nur, wenn kein Name passt.
+    Nummerierte Parameter: pro Begriff ein Wert (?1..?n), LIMIT ist ?n+1."""
+    condition = ("(element_name LIKE ?{0} ESCAPE '\\' OR table_name LIKE ?{0} ESCAPE '\\'"
+                 " OR code LIKE ?{0} ESCAPE '\\')")
+    conditions = [condition.format(i) for i in range(1, n_terms + 1)]
+    sql = """SELECT id, database_name, table_name, element_name,
+                    code_type, line_count FROM scripts WHERE 1=1"""
+    if operator == 'AND':
+        sql += " AND " + " AND ".join(conditions)
+    else:
+        sql += f" AND ({' OR '.join(conditions)})"
+    return sql + f" ORDER BY database_name, table_name LIMIT ?{n_terms + 1}"
+
+
 class Database:
     """SQLite Datenbank-Wrapper"""
 
     def __init__(self, db_path: Path):
         self.db_path = db_path
         self.conn = None
+        # Ergebnis von get_stats; nur reconnect() (nach Extraktion/Refresh) verwirft es
+        self._stats_cache = None
+        # Übersichtslisten (Typen, Datenbanken, Tabellen) je Abfrage; reconnect() verwirft sie
+        self._list_cache = {}
         self._connect()
 
+    def _file_signature(self):
+        """(Inode, mtime, Größe) der DB-Datei oder None, wenn sie fehlt"""
+        try:
+            st = self.db_path.stat()
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
     def _connect(self):
-        if self.db_path.exists():
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row
+        self._signature = self._file_signature()
+        self._has_fts = False
+        if self._signature is not None:
+            # mode=ro: verschwindet die Datei zwischendurch, wird keine leere angelegt
+            self.conn = connect_readonly(self.db_path)
+            # Ältere DB-Dateien haben noch keinen Volltextindex
+            self._has_fts = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'scripts_fts'").fetchone() is not None
 
     def reconnect(self):
+        # Die Extraktion löscht und ersetzt die Datei; ist sie unverändert,
+        # bleiben Verbindung, Page-Cache und Statistik erhalten
+        if self.conn and self._file_signature() == self._signature:
+            return
         if self.conn:
             self.conn.close()
+            self.conn = None
+        self.invalidate_stats()
+        self._list_cache.clear()
         self._connect()
 
+    def invalidate_stats(self):
+        """Verwirft die gemerkten Zählungen; get_stats zählt neu"""
+        self._stats_cache = None
+
     def close(self):
         if self.conn:
             self.conn.close()
 
     def get_stats(self) -> dict:
+        if self._stats_cache is not None:
+            return self._stats_cache
         stats = {'databases': 0, 'tables': 0, 'fields': 0, 'scripts': 0, 'deps': 0}
         if not self.conn:
             return stats
+        self._stats_cache = stats
         cur = self.conn.cursor()
-        for key, table in [('databases', 'databases'), ('tables', 'tables'),
-                           ('fields', 'fields'), ('scripts', 'scripts'),
-                           ('deps', 'script_dependencies')]:
+        counts = [('databases', 'databases'), ('tables', 'tables'),
+                  ('fields', 'fields'), ('scripts', 'scripts'),
+                  ('deps', 'script_dependencies')]
+        # Alle Zählungen in einer Abfrage; fehlt eine Tabelle (ältere DB),
+        # einzeln zählen, damit die übrigen Werte erhalten bleiben
+        try:
+            cur.execute("SELECT " + ", ".join(
+                f"(SELECT COUNT(*) FROM {table})" for _, table in counts))
+            stats.update(zip((key for key, _ in counts), cur.fetchone()))
+            return stats
+        except sqlite3.Error:
+            pass
+        for key, table in counts:
             try:
                 cur.execute(f"SELECT COUNT(*) FROM {table}")
                 stats[key] = cur.fetchone()[0]
-            except:
+            except sqlite3.Error:
                 pass
         return stats
 
@@ -89,69 +225,126 @@ class Database:
             return []
         cur = self.conn.cursor()
 
-        # AND/OR parsen
-        import re
-        upper = query.upper()
-        if ' AND ' in upper:
-            parts = re.split(r'\s+AND\s+', query, flags=re.IGNORECASE)
-            terms, operator = [p.strip() for p in parts], 'AND'
-        elif ' OR ' in upper:
-            parts = re.split(r'\s+OR\s+', query, flags=re.IGNORECASE)
-            terms, operator = [p.strip() for p in parts], 'OR'
-        else:
-            terms, operator = [query.strip()], 'AND'
-
-        sql = """SELECT id, database_name, table_name, element_name,
-                        code_type, code, line_count FROM scripts WHERE 1=1"""
-        params = []
+        # AND/OR parsen; ein Split pro Operator, ohne Großschreib-Kopie der Anfrage
+        parts, operator = _AND_RE.split(query), 'AND'
+        if len(parts) == 1:
+            parts, operator = _OR_RE.split(query), 'OR'
+        terms = [p.strip() for p in parts]
+
+        results = self._search_fts(terms, operator, limit)
+        if results is not None:
+            return results
 
         if operator == 'AND':
-            for term in terms:
-                sql += " AND (code LIKE ? OR element_name LIKE ? OR table_name LIKE ?)"
-                params.extend([f'%{term}%'] * 3)
-        else:
-            conditions = []
-            for term in terms:
-                conditions.append("(code LIKE ? OR element_name LIKE ? OR table_name LIKE ?)")
-                params.extend([f'%{term}%'] * 3)
-            sql += f" AND ({' OR '.join(conditions)})"
-
-        sql += f" ORDER BY database_name, table_name LIMIT {limit}"
-        cur.execute(sql, params)
-        return [dict(row) for row in cur.fetchall()]
+            # Lange Begriffe treffen seltener: zuerst prüfen, damit das AND
+            # für die meisten Zeilen früh scheitert
+            terms = sorted(terms, key=len, reverse=True)
+        # Begriffe wörtlich suchen: % und _ sind sonst LIKE-Platzhalter
+        params = ['%' + _LIKE_ESCAPE_RE.sub(r'\\\g<0>', term) + '%' for term in terms]
+        params.append(limit)
+        cur.execute(_like_search_sql(operator, len(terms)), params)
+        return list(map(dict, cur))
+
+    def _search_fts(self, terms: list, operator: str, limit: int):
+        """Suche über den FTS5-Index scripts_fts (Code, Element, Tabelle).
+
+        Jeder Begriff wird als Phrase mit Präfix-Suche gequotet. Gibt None
+        zurück, wenn ein Begriff keine Wörter enthält oder die DB keinen
+        Index hat; dann sucht search_scripts per LIKE.
+        """
+        if not self._has_fts or not all(map(_WORD_RE.search, terms)):
+            return None
+        phrases = ['"' + term.replace('"', '""') + '"*' for term in terms]
+        match = '{code element_name table_name} : (' + f' {operator} '.join(phrases) + ')'
+        try:
+            cur = self.conn.execute("""SELECT s.id, s.database_name, s.table_name, s.element_name,
+                                              s.code_type, s.line_count
+                                       FROM scripts_fts JOIN scripts s ON s.id = scripts_fts.rowid
+                                       WHERE scripts_fts MATCH ?
+                                       ORDER BY s.database_name, s.table_name LIMIT ?""",
+                                    (match, limit))
+            return list(map(dict, cur))
+        except sqlite3.OperationalError:
+            return None
+
+    def _cached_rows(self, sql: str, params: tuple = ()) -> list:
+        """Ergebnis einer Übersichtsabfrage, gemerkt bis zum nächsten reconnect().
+
+        Typ-, Datenbank- und Tabellenlisten werden nur gelesen: sqlite3.Row
+        (Zugriff per Spaltenname) genügt, ohne Kopie in ein dict.
+        """
+        rows = self._list_cache.get((sql, params))
+        if rows is None:
+            rows = self._list_cache[(sql, params)] = self.conn.execute(sql, params).fetchall()
+        return rows
 
     def get_script_types(self) -> list:
         if not self.conn:
             return []
-        cur = self.conn.cursor()
-        cur.execute("""SELECT code_type, COUNT(*) as cnt
-                       FROM scripts GROUP BY code_type ORDER BY cnt DESC""")
-        return [dict(row) for row in cur.fetchall()]
+        return self._cached_rows("""SELECT code_type, COUNT(*) as cnt
+                                    FROM scripts GROUP BY code_type ORDER BY cnt DESC""")
 
     def get_scripts_by_type(self, code_type: str, limit: int = 100) -> list:
         if not self.conn:
             return []
         cur = self.conn.cursor()
         cur.execute("""SELECT id, database_name, table_name, element_name,
-                       code_type, code, line_count FROM scripts
+                       code_type, line_count FROM scripts
                        WHERE code_type = ? LIMIT ?""", (code_type, limit))
-        return [dict(row) for row in cur.fetchall()]
+        return list(map(dict, cur))
+
+    def load_code(self, script: dict) -> str:
+        """Lädt den Code eines Treffers erst bei Bedarf und merkt ihn im Treffer.
+
+        Trefferlisten enthalten keinen Code, damit SQLite für nie angesehene
+        Zeilen keine (oft großen) Code-Texte liest und dekodiert. Maskierte
+        Zeilenumbrüche werden dabei einmal aufgelöst (clean_code).
+        """
+        if 'code' not in script:
+            code = None
+            if self.conn:
+                row = self.conn.execute("SELECT code FROM scripts WHERE id = ?",
+                                        (script['id'],)).fetchone()
+                code = row[0] if row else None
+            script['code'] = clean_code(code)
+        return script['code']
+
+    def get_code_head(self, script: dict, size: int = 512) -> tuple:
+        """Anfang des Codes und Zeilenzahl (für die Vorschau), ohne den ganzen Text zu laden.
+
+        Die Zeilenzahl gilt wie die Anzeige für den bereinigten Code: echte
+        Umbrüche plus maskierte \\n, die clean_code zu Umbrüchen macht.
+        """
+        if 'code' in script:
+            code = script['code']
+            return code[:size], code.count('\n') + 1
+        if not self.conn:
+            return '', 1
+        row = self.conn.execute(
+            "SELECT substr(code, 1, ?),"
+            " 1 + length(code) - length(replace(code, char(10), ''))"
+            " + (length(code) - length(replace(code, '\\n', ''))) / 2"
+            " FROM scripts WHERE id = ?",
+            (size, script['id'])).fetchone()
+        if not row:
+            return '', 1
+        return clean_code(row[0]), row[1] or 1
 
     def get_databases(self) -> list:
         if not self.conn:
             return []
-        cur = self.conn.cursor()
-        cur.execute("SELECT id, name, table_count, code_count FROM databases ORDER BY name")
-        return [dict(row) for row in cur.fetchall()]
+        return self._cached_rows("SELECT id, name, table_count, code_count FROM databases ORDER BY name")
 
     def get_tables(self, limit: int = 100) -> list:
         if not self.conn:
             return []
-        cur = self.conn.cursor()
-        cur.execute("""SELECT t.name, t.caption, t.field_count, d.name as db_name
-                       FROM tables t JOIN databases d ON t.database_id = d.id
-                       ORDER BY d.name, t.name LIMIT ?""", (limit,))
-        return [dict(row) for row in cur.fetchall()]
+        # Beschriftung nur, wenn sie vom Namen abweicht (gekürzt für die Liste)
+        return self._cached_rows("""SELECT t.name,
+                                           CASE WHEN t.caption = t.name THEN ''
+                                                ELSE substr(IFNULL(t.caption, ''), 1, 20) END AS caption,
+                                           t.field_count, d.name as db_name
+                                    FROM tables t JOIN databases d ON t.database_id = d.id
+                                    ORDER BY d.name, t.name LIMIT ?""", (limit,))
 
 
 # ─────────────────────────────────────────────────────────────
@@ -194,7 +387,8 @@ class ScriptDetailScreen(ModalScreen):
         self.script = script
 
     def compose(self) -> ComposeResult:
-        code = (self.script.get('code') or '').replace('\\n', '\n').replace('\\t', '\t')
+        # Code kommt aus Database.load_code, Umbrüche sind bereits aufgelöst
+        code = self.script.get('code') or ''
 
         with Container():
             yield Static(
@@ -251,7 +445,9 @@ class ExtractScreen(ModalScreen):
         self.environments = environments
         self.db_path = db_path
         self.on_complete = on_complete
-        self.log_text = ""
+        # Log-Stücke sammeln und gebündelt anzeigen; nur die letzten bleiben
+        self._log_parts = deque(maxlen=self.LOG_MAX_PARTS)
+        self._log_dirty = False
 
     def compose(self) -> ComposeResult:
         with Container():
@@ -277,39 +473,90 @@ class ExtractScreen(ModalScreen):
             env_name = button_id[4:]
             self.run_extraction([env_name])
 
-    def _log(self, text: str):
-        """Fügt Text zum Log hinzu und aktualisiert das Widget"""
-        self.log_text += text
-        self.query_one("#extract-log", Static).update(self.log_text)
+    LOG_MAX_PARTS = 500
 
-    def run_extraction(self, env_names: list):
-        self.log_text = "[bold]Extraktion gestartet...[/]\n"
-        self._log("")
+    def on_mount(self) -> None:
+        # Höchstens zehn Neuzeichnungen pro Sekunde, egal wie schnell geloggt wird
+        self.set_interval(0.1, self._flush_log)
 
-        for env_name in env_names:
-            self._log(f"\n► Extrahiere [bold]{env_name}[/]...")
+    @property
+    def log_text(self) -> str:
+        return ''.join(self._log_parts)
 
-            cmd = [sys.executable, str(EXTRACTOR), 'extract',
-                   '--config', str(CONFIG_FILE), '--env', env_name,
-                   '--db', str(self.db_path)]
+    def _log(self, text: str):
+        """Fügt Text zum Log hinzu; das Widget aktualisiert _flush_log"""
+        self._log_parts.append(text)
+        self._log_dirty = True
 
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(SCRIPT_DIR))
-                if result.returncode == 0:
-                    self._log(" [green]✓[/]")
-                else:
-                    self._log(f" [red]✗[/]\n{result.stderr[:200]}")
-            except Exception as e:
-                self._log(f" [red]✗ {e}[/]")
+    def _flush_log(self) -> None:
+        if self._log_dirty:
+            self._log_dirty = False
+            self.query_one("#extract-log", Static).update(self.log_text)
 
-        self._log("\n\n[dim]ESC zum Schließen[/]")
-        self.on_complete()
+    def _set_buttons_disabled(self, disabled: bool):
+        for button in self.query(".env-button"):
+            button.disabled = disabled
+
+    def run_extraction(self, env_names: list):
+        # Während der Extraktion keine zweite starten: beide würden dieselbe DB-Datei neu schreiben
+        self._set_buttons_disabled(True)
+        self._log_parts.clear()
+        self._log("[bold]Extraktion gestartet...[/]\n")
+        self._extract(env_names)
+
+    @work(exclusive=True, thread=True)
+    def _extract(self, env_names: list):
+        """Worker: ruft den Extractor für alle Environments auf und streamt dessen Ausgabe ins Log"""
+        worker = get_current_worker()
+
+        def log(text: str):
+            if not worker.is_cancelled:
+                self.app.call_from_thread(self._log, text)
+
+        # Ein Prozess für alle Environments: Interpreter-Start und Imports nur
+        # einmal; der Extractor schreibt sie nacheinander in dieselbe DB
+        log(f"\n► Extrahiere [bold]{escape(', '.join(env_names))}[/]...")
+
+        # -u: ohne Pufferung kommt der Fortschritt zeilenweise an statt erst bei Prozessende
+        cmd = [sys.executable, '-u', str(EXTRACTOR), 'extract',
+               '--config', str(CONFIG_FILE), '--env', ','.join(env_names),
+               '--db', str(self.db_path)]
+
+        # Nur die letzten Zeilen behalten, für die Fehlermeldung
+        tail = deque(maxlen=10)
+        try:
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                  text=True, bufsize=1, cwd=str(SCRIPT_DIR)) as proc:
+                for line in proc.stdout:
+                    tail.append(line)
+                    if line.startswith('► '):
+                        log(f"\n\n[bold]{escape(line.strip())}[/]")
+                    elif 'databases:' in line or 'scripts:' in line or '❌' in line:
+                        log(f"\n  {escape(line.strip())}")
+            if proc.returncode == 0:
+                log(" [green]✓[/]")
+            else:
+                log(f" [red]✗[/]\n{escape(''.join(tail)[-200:])}")
+        except Exception as e:
+            log(f" [red]✗ {escape(str(e))}[/]")
+
+        log("\n\n[dim]ESC zum Schließen[/]")
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._set_buttons_disabled, False)
+        self.app.call_from_thread(self.on_complete)
 
 
 # ─────────────────────────────────────────────────────────────
 # HAUPTANWENDUNG
 # ─────────────────────────────────────────────────────────────
 
+# Balken der Code-Typ-Übersicht: ein Block je 10 Scripts, höchstens 20
+_BARS = tuple('█' * i for i in range(21))
+
+# Spalten eines Script-Treffers für die Ergebnistabelle, in einem C-Aufruf
+_RESULT_COLUMNS = itemgetter('table_name', 'element_name', 'code_type', 'line_count')
+
+
 class NinoxViewer(App):
     """Ninox Database Viewer - Textual App"""
 
@@ -388,8 +635,10 @@ class NinoxViewer(App):
         super().__init__()
         self.db_path = db_path
         self.db = Database(db_path)
-        self.environments = load_config()
         self.current_results = []
+        self._search_timer = None
+        # Vorschau-Texte nach Script-ID, damit Hin- und Herblättern nicht neu lädt
+        self._previews: "OrderedDict[int, str]" = OrderedDict()
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
@@ -414,18 +663,24 @@ class NinoxViewer(App):
 
         yield Footer()
 
+    @property
+    def environments(self) -> dict:
+        """Environments aus config.yaml; erst gelesen, wenn extrahiert wird"""
+        return load_config()
+
     def on_mount(self) -> None:
         table = self.query_one("#results-table", DataTable)
         table.add_columns("Nr", "Tabelle", "Element", "Typ", "Zeilen")
         self._show_script_types()
 
+    # Statistik-Zeile; nur die Zahlen ändern sich
+    STATS_TEMPLATE = (
+        "[bold]Statistik:[/] {databases} Datenbanken │ "
+        "{tables} Tabellen │ {scripts} Scripts │ {fields} Felder"
+    )
+
     def _get_stats_text(self) -> str:
-        stats = self.db.get_stats()
-        return (
-            f"[bold]Statistik:[/] {stats['databases']} Datenbanken │ "
-            f"{stats['tables']} Tabellen │ {stats['scripts']} Scripts │ "
-            f"{stats['fields']} Felder"
-        )
+        return self.STATS_TEMPLATE.format_map(self.db.get_stats())
 
     def _update_stats(self) -> None:
         self.query_one("#stats-panel", Static).update(self._get_stats_text())
@@ -439,15 +694,17 @@ class NinoxViewer(App):
         table = self.query_one("#results-table", DataTable)
         table.clear()
 
-        for i, row in enumerate(results, 1):
-            table.add_row(
-                str(i),
-                row.get('table_name') or '(global)',
-                row.get('element_name') or '-',
-                row.get('code_type', ''),
-                str(row.get('line_count', 0)),
-                key=str(i-1)
-            )
+        with self.batch_update():
+            for i, (table_name, element_name, code_type, line_count) in enumerate(
+                    map(_RESULT_COLUMNS, results), 1):
+                table.add_row(
+                    str(i),
+                    table_name or '(global)',
+                    element_name or '-',
+                    code_type,
+                    str(line_count),
+                    key=str(i-1)
+                )
 
         self.query_one("#code-preview", Static).update(f"[dim]{len(results)} Ergebnisse[/]")
 
@@ -458,16 +715,17 @@ class NinoxViewer(App):
         table = self.query_one("#results-table", DataTable)
         table.clear()
 
-        for i, t in enumerate(types, 1):
-            bar = '█' * min(t['cnt'] // 10, 20)
-            table.add_row(
-                str(i),
-                t['code_type'],
-                str(t['cnt']),
-                bar,
-                "",
-                key=f"type-{i-1}"
-            )
+        with self.batch_update():
+            for i, t in enumerate(types, 1):
+                bar = _BARS[min(t['cnt'] // 10, 20)]
+                table.add_row(
+                    str(i),
+                    t['code_type'],
+                    str(t['cnt']),
+                    bar,
+                    "",
+                    key=f"type-{i-1}"
+                )
 
         self.query_one("#code-preview", Static).update(
             "[dim]Wähle einen Code-Typ um Scripts anzuzeigen[/]"
@@ -480,15 +738,16 @@ class NinoxViewer(App):
         table = self.query_one("#results-table", DataTable)
         table.clear()
 
-        for i, db in enumerate(dbs, 1):
-            table.add_row(
-                str(i),
-                db['name'],
-                f"{db['table_count']} Tab.",
-                f"{db['code_count']} Scripts",
-                "",
-                key=f"db-{i-1}"
-            )
+        with self.batch_update():
+            for i, db in enumerate(dbs, 1):
+                table.add_row(
+                    str(i),
+                    db['name'],
+                    f"{db['table_count']} Tab.",
+                    f"{db['code_count']} Scripts",
+                    "",
+                    key=f"db-{i-1}"
+                )
 
         self.query_one("#code-preview", Static).update(f"[dim]{len(dbs)} Datenbanken[/]")
 
@@ -499,18 +758,16 @@ class NinoxViewer(App):
         table = self.query_one("#results-table", DataTable)
         table.clear()
 
-        for i, t in enumerate(tables, 1):
-            caption = t.get('caption') or ''
-            if caption == t['name']:
-                caption = ''
-            table.add_row(
-                str(i),
-                t['db_name'],
-                t['name'],
-                caption[:20],
-                f"{t['field_count']} F.",
-                key=f"tbl-{i-1}"
-            )
+        with self.batch_update():
+            for i, t in enumerate(tables, 1):
+                table.add_row(
+                    str(i),
+                    t['db_name'],
+                    t['name'],
+                    t['caption'],
+                    f"{t['field_count']} F.",
+                    key=f"tbl-{i-1}"
+                )
 
         self.query_one("#code-preview", Static).update(f"[dim]{len(tables)} Tabellen[/]")
 
@@ -532,12 +789,25 @@ class NinoxViewer(App):
         elif button_id == "btn-extract":
             self.action_extract()
 
+    def on_input_changed(self, event: Input.Changed) -> None:
+        if event.input.id == "search-input":
+            # Suche beim Tippen, aber erst wenn die Eingabe kurz ruht
+            if self._search_timer is not None:
+                self._search_timer.stop()
+            self._search_timer = self.set_timer(SEARCH_DEBOUNCE, self._do_search)
+
     def on_input_submitted(self, event: Input.Submitted) -> None:
         if event.input.id == "search-input":
-            query = event.value.strip()
-            if query:
-                results = self.db.search_scripts(query)
-                self._show_results(results, f"Suche: {query}")
+            self._do_search()
+
+    def _do_search(self) -> None:
+        if self._search_timer is not None:
+            self._search_timer.stop()
+            self._search_timer = None
+        query = self.query_one("#search-input", Input).value.strip()
+        if query:
+            results = self.db.search_scripts(query)
+            self._show_results(results, f"Suche: {query}")
 
     def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
         if not self.current_results:
@@ -560,7 +830,8 @@ class NinoxViewer(App):
             idx = int(key) if key else event.cursor_row
             if 0 <= idx < len(self.current_results):
                 script = self.current_results[idx]
-                if 'code' in script:
+                if 'line_count' in script:
+                    self.db.load_code(script)
                     self.push_screen(ScriptDetailScreen(script))
         except (ValueError, TypeError):
             pass
@@ -578,15 +849,33 @@ class NinoxViewer(App):
             idx = int(key) if key else event.cursor_row
             if 0 <= idx < len(self.current_results):
                 script = self.current_results[idx]
-                code = (script.get('code') or '').replace('\\n', '\n').replace('\\t', '\t')
-                lines = [l for l in code.split('\n') if l.strip()][:3]
-                preview = '\n'.join(lines)
-                if len(code.split('\n')) > 3:
-                    preview += f"\n[dim]... +{len(code.split(chr(10)))-3} Zeilen[/]"
-                self.query_one("#code-preview", Static).update(preview)
+                self.query_one("#code-preview", Static).update(self._code_preview(script))
         except (ValueError, TypeError):
             pass
 
+    PREVIEW_CACHE_SIZE = 128
+
+    def _code_preview(self, script: dict) -> str:
+        """Erste drei nicht-leere Code-Zeilen plus Hinweis auf die übrigen"""
+        script_id = script.get('id')
+        preview = self._previews.get(script_id)
+        if preview is not None:
+            self._previews.move_to_end(script_id)
+            return preview
+
+        # line_count aus der DB zählt den Rohcode; maßgeblich ist der angezeigte
+        head, line_count = self.db.get_code_head(script)
+        lines = list(islice((l for l in iter_lines(head) if l.strip()), 3))
+        preview = '\n'.join(lines)
+        if line_count > 3:
+            preview += f"\n[dim]... +{line_count-3} Zeilen[/]"
+
+        if script_id is not None:
+            self._previews[script_id] = preview
+            while len(self._previews) > self.PREVIEW_CACHE_SIZE:
+                self._previews.popitem(last=False)
+        return preview
+
     # ─────────────────────────────────────────────────────────────
     # ACTIONS
     # ─────────────────────────────────────────────────────────────
@@ -596,20 +885,23 @@ class NinoxViewer(App):
 
     def action_refresh(self) -> None:
         self.db.reconnect()
+        self._previews.clear()
         self._update_stats()
         self._show_script_types()
         self.notify("Daten aktualisiert", timeout=2)
 
     def action_extract(self) -> None:
-        if not self.environments:
+        environments = self.environments
+        if not environments:
             self.notify("Keine Environments in config.yaml", severity="error")
             return
 
         def on_complete():
             self.db.reconnect()
+            self._previews.clear()
             self._update_stats()
 
-        self.push_screen(ExtractScreen(self.environments, self.db_path, on_complete))
+        self.push_screen(ExtractScreen(environments, self.db_path, on_complete))
 
     def action_show_databases(self) -> None:
         self._show_databases_list()